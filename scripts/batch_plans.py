@@ -0,0 +1,53 @@
+"""Generates itineraries (Markdown + PDF) for every trip in a CSV or JSONL file."""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from travelbuddy.batch import (  # noqa: E402
+    DEFAULT_CONCURRENCY, DEFAULT_PDF_WORKERS, DEFAULT_REQUESTS_PER_MINUTE, BatchRunner, load_trip_specs,
+)
+from travelbuddy.cache import PlanCache  # noqa: E402
+from travelbuddy.llm import GeminiClient, LLMConfigError, create_backend  # noqa: E402
+from travelbuddy.metrics import METRICS, configure_event_log  # noqa: E402
+from travelbuddy.planner import PLAN_FORMATS  # noqa: E402
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("specs", help="CSV or JSONL file with origin, destination, start_date, end_date, ...")
+    parser.add_argument("--out", default="batch_output", help="Output directory (also holds the checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="Request rate limit per minute")
+    parser.add_argument("--format", choices=PLAN_FORMATS, default=os.getenv("TRAVELBUDDY_PLAN_FORMAT", "text"),
+                        help="Ask Gemini for tagged text or schema-checked JSON")
+    parser.add_argument("--pdf-workers", type=int, default=DEFAULT_PDF_WORKERS, help="PDF processes (0 skips PDFs)")
+    args = parser.parse_args()
+    if os.getenv("TRAVELBUDDY_EVENT_LOG"):
+        configure_event_log(os.getenv("TRAVELBUDDY_EVENT_LOG"))
+
+    try:
+        client = GeminiClient(
+            os.getenv("GOOGLE_API_KEY"),
+            timeout=float(os.getenv("TRAVELBUDDY_LLM_TIMEOUT", "60")),
+            max_retries=int(os.getenv("TRAVELBUDDY_LLM_MAX_RETRIES", "3")),
+            backend=create_backend(os.getenv("TRAVELBUDDY_LLM_BACKEND"), os.getenv("GOOGLE_API_KEY"),
+                                   os.getenv("TRAVELBUDDY_FAKE_LLM")),
+        )
+    except LLMConfigError as exc:
+        sys.exit(f"Cannot start: {exc}")
+    plan_cache = PlanCache(os.getenv("TRAVELBUDDY_CACHE_PATH", os.path.join(".cache", "travelbuddy.sqlite3")))
+    runner = BatchRunner(client, plan_cache, args.out, concurrency=args.concurrency,
+                         requests_per_minute=args.rpm, pdf_workers=args.pdf_workers, plan_format=args.format)
+    summary = runner.run(load_trip_specs(args.specs))
+    if os.getenv("TRAVELBUDDY_METRICS_PATH"):
+        METRICS.write_prometheus(os.getenv("TRAVELBUDDY_METRICS_PATH"))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
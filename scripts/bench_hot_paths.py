@@ -0,0 +1,145 @@
+"""
+Benchmarks the app's hot paths against the offline fake LLM backend, so the
+numbers don't depend on the network or on Gemini: plan generation plumbing,
+parsing (whole and streamed), JSON plan rendering, location extraction,
+plan translation and a full page run with a plan loaded. A second pass
+injects errors and malformed plans and reports how retries and repairs
+coped.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from travelbuddy.cities import CITY_NAMES  # noqa: E402
+from travelbuddy.fake_llm import FakeBackend  # noqa: E402
+from travelbuddy.llm import GeminiClient, LLMError  # noqa: E402
+from travelbuddy.metrics import METRICS  # noqa: E402
+from travelbuddy.plan_parser import IncrementalPlanParser, PlanParseError, parse_plan_text  # noqa: E402
+from travelbuddy.planner import build_structured_prompt, extract_locations, generate_travel_plan  # noqa: E402
+from travelbuddy.translation import translate_plan  # noqa: E402
+from travelbuddy.structured_plan import (  # noqa: E402
+    generation_config, load_plan_json, render_plan_text, validate_plan_data,
+)
+
+TRIP = {
+    "origin": "Delhi", "destination": "Goa", "start_date_str": "01 March 2026", "end_date_str": "06 March 2026",
+    "travelers": 2, "budget": "💰💰 Mid-Range", "interests": ["🍽️ Food"], "language": "English",
+}
+RELIABILITY_COUNTERS = (
+    "travelbuddy_llm_retries_total", "travelbuddy_plan_parse_failures_total", "travelbuddy_plan_repairs_total",
+)
+
+
+def timed(fn, iterations):
+    """Median seconds per call over `iterations` calls."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def trip(destination, duration):
+    return dict(TRIP, destination=destination, duration=duration)
+
+
+def bench_paths(args):
+    client = GeminiClient(backend=FakeBackend(days=args.days, locations=args.locations), max_retries=0)
+    plan_text = generate_travel_plan(client, None, **trip("Goa", args.days))
+    plan_json = client.generate(build_structured_prompt(**trip("Goa", args.days)), generation_config=generation_config())
+    destinations = [city for city in CITY_NAMES if city != "Delhi"]
+    calls = iter(range(10 ** 9))
+
+    def stream_parse():
+        parser = IncrementalPlanParser()
+        for i in range(0, len(plan_text), 40):
+            parser.feed(plan_text[i:i + 40])
+        parser.close()
+
+    parsed = parse_plan_text(plan_text)
+    fallbacks = METRICS.counter_total("travelbuddy_translation_fallbacks_total")
+    translated = translate_plan(client, None, parsed, "Hindi")
+    if (translated.location_records != parsed.location_records
+            or METRICS.counter_total("travelbuddy_translation_fallbacks_total") != fallbacks):
+        sys.exit("The fake backend's translation lost the plan's location markup.")
+
+    return {
+        "generate_plan": timed(lambda: generate_travel_plan(
+            client, None, **trip(destinations[next(calls) % len(destinations)], args.days)), args.iterations),
+        "parse_plan": timed(lambda: parse_plan_text(plan_text), args.iterations),
+        "stream_parse": timed(stream_parse, args.iterations),
+        "render_json_plan": timed(lambda: render_plan_text(validate_plan_data(load_plan_json(plan_json), args.days)[0]),
+                                  args.iterations),
+        "extract_locations": timed(lambda: extract_locations(plan_text), args.iterations),
+        "translate_plan": timed(lambda: translate_plan(client, None, parsed, "Hindi"), args.iterations),
+    }
+
+
+def bench_page(args):
+    """Median seconds for a page run with a generated plan on screen."""
+    os.environ.update({
+        "TRAVELBUDDY_LLM_BACKEND": "fake", "TRAVELBUDDY_FAKE_LLM": f"days={args.days},locations={args.locations}",
+        "TRAVELBUDDY_WARM_IMPORTS": "0", "TRAVELBUDDY_CACHE_PATH": ":memory:", "TRAVELBUDDY_TRIPS_PATH": ":memory:",
+    })
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(PROJECT_ROOT, "app.py"), default_timeout=120)
+    at.run()
+    next(button for button in at.button if "Generate My" in button.label).click().run()
+    return timed(at.run, max(3, args.iterations // 20))
+
+
+def bench_reliability(args):
+    """Generates plans with faults injected; returns outcome counts."""
+    client = GeminiClient(backend=FakeBackend.from_spec(args.faults), backoff_base=0.001, backoff_max=0.01)
+    before = {name: METRICS.counter_total(name) for name in RELIABILITY_COUNTERS}
+    outcomes = {"ok": 0, "unparseable": 0, "failed": 0}
+    for number in range(args.plans):
+        try:
+            text = generate_travel_plan(client, None, **trip(CITY_NAMES[number % len(CITY_NAMES)], args.days))
+            parse_plan_text(text)
+            outcomes["ok"] += 1
+        except LLMError:
+            outcomes["failed"] += 1
+        except PlanParseError:
+            outcomes["unparseable"] += 1
+    for name in RELIABILITY_COUNTERS:
+        outcomes[name.replace("travelbuddy_", "")] = METRICS.counter_total(name) - before[name]
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200, help="Samples per hot path (default 200)")
+    parser.add_argument("--days", type=int, default=5, help="Days per fake plan (default 5)")
+    parser.add_argument("--locations", type=int, default=4, help="Locations per fake day (default 4)")
+    parser.add_argument("--faults", default="seed=1,error_rate=0.2,timeout_rate=0.05,malformed_rate=0.3",
+                        help="Fake backend options for the reliability pass")
+    parser.add_argument("--plans", type=int, default=50, help="Plans generated in the reliability pass")
+    parser.add_argument("--skip-page", action="store_true", help="Don't time a full page run (skips Streamlit)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {"hot_paths_seconds": bench_paths(args)}
+    if not args.skip_page:
+        results["hot_paths_seconds"]["page_run"] = bench_page(args)
+    results["reliability"] = bench_reliability(args)
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"Hot paths (median of {args.iterations}, {args.days} days x {args.locations} locations):")
+    for name, seconds in results["hot_paths_seconds"].items():
+        print(f"  {name:<20} {seconds * 1000:9.3f} ms")
+    print(f"Reliability ({args.plans} plans, {args.faults}):")
+    for name, count in results["reliability"].items():
+        print(f"  {name:<28} {count}")
+
+
+if __name__ == "__main__":
+    main()
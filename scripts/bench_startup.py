@@ -0,0 +1,71 @@
+"""
+Measures cold start: interpreter + Streamlit import time, the app's first
+render, and which heavy libraries the first render pulled in. Every sample
+runs in a fresh Python process so nothing is already imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Libraries the first page should not need; they load when their feature is used.
+HEAVY_MODULES = ("google.generativeai", "pandas", "pydeck", "fpdf")
+
+_SAMPLE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_render_seconds": rendered - imported,
+    "exceptions": len(at.exception),
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def sample():
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    # Background warm-up would race the "loaded" check.
+    env["TRAVELBUDDY_WARM_IMPORTS"] = "0"
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _SAMPLE % (HEAVY_MODULES,)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to sample (default 5)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    summary = {
+        "runs": args.runs,
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "first_render_seconds": round(statistics.median(s["first_render_seconds"] for s in samples), 3),
+        "exceptions": max(s["exceptions"] for s in samples),
+        "loaded_on_first_render": samples[-1]["loaded"],
+    }
+    if args.json:
+        print(json.dumps(summary))
+        return
+    print(f"Streamlit import (median of {args.runs}): {summary['import_seconds']:.3f} s")
+    print(f"First render (median of {args.runs}):     {summary['first_render_seconds']:.3f} s")
+    print(f"Heavy modules loaded by first render: {', '.join(summary['loaded_on_first_render']) or 'none'}")
+    if summary["exceptions"]:
+        print(f"Warning: the app raised {summary['exceptions']} exception(s) on first render")
+
+
+if __name__ == "__main__":
+    main()
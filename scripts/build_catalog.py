@@ -0,0 +1,73 @@
+"""
+Builds the precomputed plan catalog (data/plan_catalog.sqlite3) that the app
+serves without calling Gemini. By default it covers every route between the
+bundled cities with the sidebar's default trip settings.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from travelbuddy.cache import PlanCache  # noqa: E402
+from travelbuddy.catalog import (  # noqa: E402
+    DEFAULT_BUDGETS, DEFAULT_BUILD_WORKERS, DEFAULT_DURATIONS, DEFAULT_INTEREST_SETS, DEFAULT_LANGUAGES,
+    DEFAULT_TRAVELERS, build_catalog, catalog_entries,
+)
+from travelbuddy.cities import CITY_NAMES  # noqa: E402
+from travelbuddy.llm import GeminiClient, LLMConfigError, create_backend  # noqa: E402
+from travelbuddy.metrics import METRICS, configure_event_log  # noqa: E402
+from travelbuddy.planner import PLAN_FORMATS  # noqa: E402
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=os.getenv("TRAVELBUDDY_CATALOG_PATH", os.path.join("data", "plan_catalog.sqlite3")))
+    parser.add_argument("--origins", nargs="+", default=list(CITY_NAMES), help="Origin cities (default: all)")
+    parser.add_argument("--destinations", nargs="+", default=list(CITY_NAMES), help="Destination cities (default: all)")
+    parser.add_argument("--durations", nargs="+", type=int, default=list(DEFAULT_DURATIONS), help="Trip lengths in days")
+    parser.add_argument("--travelers", nargs="+", type=int, default=list(DEFAULT_TRAVELERS))
+    parser.add_argument("--budgets", nargs="+", default=list(DEFAULT_BUDGETS))
+    parser.add_argument("--interests", nargs="+", default=[";".join(i) for i in DEFAULT_INTEREST_SETS],
+                        help="Interest combinations, each ';'-separated")
+    parser.add_argument("--languages", nargs="+", default=list(DEFAULT_LANGUAGES))
+    parser.add_argument("--version", help="Label stored in the catalog (default: build time)")
+    parser.add_argument("--refresh", action="store_true", help="Keep entries from the existing catalog instead of regenerating them")
+    parser.add_argument("--max-age-days", type=float, help="With --refresh, regenerate entries older than this")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BUILD_WORKERS, help="Entries generated at once")
+    parser.add_argument("--format", choices=PLAN_FORMATS, default=os.getenv("TRAVELBUDDY_PLAN_FORMAT", "text"),
+                        help="Ask Gemini for tagged text or schema-checked JSON")
+    args = parser.parse_args()
+    if os.getenv("TRAVELBUDDY_EVENT_LOG"):
+        configure_event_log(os.getenv("TRAVELBUDDY_EVENT_LOG"))
+
+    try:
+        client = GeminiClient(
+            os.getenv("GOOGLE_API_KEY"),
+            timeout=float(os.getenv("TRAVELBUDDY_LLM_TIMEOUT", "60")),
+            max_retries=int(os.getenv("TRAVELBUDDY_LLM_MAX_RETRIES", "3")),
+            backend=create_backend(os.getenv("TRAVELBUDDY_LLM_BACKEND"), os.getenv("GOOGLE_API_KEY"),
+                                   os.getenv("TRAVELBUDDY_FAKE_LLM")),
+        )
+    except LLMConfigError as exc:
+        sys.exit(f"Cannot start: {exc}")
+    plan_cache = PlanCache(os.getenv("TRAVELBUDDY_CACHE_PATH", os.path.join(".cache", "travelbuddy.sqlite3")))
+    routes = [(o, d) for o in args.origins for d in args.destinations if o != d]
+    interest_sets = [[i.strip() for i in combo.split(";") if i.strip()] for combo in args.interests]
+    entries = catalog_entries(routes, args.durations, args.travelers, args.budgets, interest_sets, args.languages)
+    print(f"Building {len(entries)} catalog entries into {args.out}")
+    max_age = args.max_age_days * 24 * 60 * 60 if args.max_age_days is not None else None
+    summary = build_catalog(client, plan_cache, args.out, entries, version=args.version, plan_format=args.format,
+                            workers=args.workers, refresh=args.refresh, max_age=max_age)
+    print(f"Catalog {summary['version']}: {summary['plans']} new plans, {summary['reused']} reused, "
+          f"{summary['failed']} failed, {summary['guides']} new local guides")
+    if os.getenv("TRAVELBUDDY_METRICS_PATH"):
+        METRICS.write_prometheus(os.getenv("TRAVELBUDDY_METRICS_PATH"))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Rebuilds data/gazetteer/ from data/gazetteer.csv. Run after editing the CSV."""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travelbuddy.gazetteer import DEFAULT_CELL_DEGREES, build_gazetteer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=os.path.join("data", "gazetteer.csv"))
+    parser.add_argument("--out", default=os.path.join("data", "gazetteer"))
+    parser.add_argument("--cell-degrees", type=float, default=DEFAULT_CELL_DEGREES)
+    args = parser.parse_args()
+    count = build_gazetteer(args.csv, args.out, args.cell_degrees)
+    print(f"Wrote {count} places to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
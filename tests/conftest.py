@@ -0,0 +1,41 @@
+"""Runs app.py in AppTest sessions on the offline fake backend, with all storage under tmp_path."""
+import os
+import sys
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def new_session(tmp_path, monkeypatch):
+    """Returns a function that starts a fresh browser session and generates the sidebar's default trip."""
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setenv("TRAVELBUDDY_LLM_BACKEND", "fake")
+    monkeypatch.setenv("TRAVELBUDDY_FAKE_LLM", "days=2")
+    monkeypatch.setenv("TRAVELBUDDY_WARM_IMPORTS", "0")
+    monkeypatch.setenv("TRAVELBUDDY_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setenv("TRAVELBUDDY_TRIPS_PATH", str(tmp_path / "trips.sqlite3"))
+    monkeypatch.setenv("TRAVELBUDDY_PHOTO_DIR", str(tmp_path / "photos"))
+    # The stores are cache_resource singletons; drop the ones opened on an earlier test's tmp_path.
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    # travelbuddy.ui.settings reads the environment once, on import.
+    for name in [name for name in sys.modules if name == "travelbuddy.ui" or name.startswith("travelbuddy.ui.")]:
+        monkeypatch.delitem(sys.modules, name)
+
+    def start():
+        at = AppTest.from_file(APP, default_timeout=60)
+        at.run()
+        next(button for button in at.button if "Generate My" in button.label).click().run()
+        assert not at.exception
+        return at
+
+    return start
+
+
+@pytest.fixture
+def app(new_session):
+    return new_session()
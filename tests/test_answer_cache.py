@@ -0,0 +1,18 @@
+"""Chat answers are reused for paraphrases, not for questions about other places or in other languages."""
+from travelbuddy.answer_cache import SemanticAnswerCache
+
+
+def test_paraphrase_hits_but_other_place_misses():
+    cache = SemanticAnswerCache(place_names=("Baga Beach", "Calangute Beach", "Goa"))
+    assert cache.add("Goa", "English", "taxi from airport to baga beach at night", "Take a prepaid taxi.")
+
+    assert cache.lookup("Goa", "English", "Taxi from the airport to Baga beach at night?")[0] == "Take a prepaid taxi."
+    assert cache.lookup("Goa", "English", "taxi from airport to calangute beach at night") is None
+    assert cache.lookup("Goa", "Hindi (हिन्दी)", "taxi from airport to baga beach at night") is None
+    assert cache.lookup("", "English", "taxi from airport to baga beach at night") is None
+
+
+def test_destination_name_is_not_distinguishing():
+    cache = SemanticAnswerCache()
+    cache.add("Goa", "English", "Is it safe at night in Goa?", "Mostly, in busy areas.")
+    assert cache.lookup("goa", "English", "is goa safe at night") is not None
@@ -0,0 +1,23 @@
+"""Journal photos: uploads don't block the rerun, and a missing original doesn't break the journal."""
+import io
+import shutil
+
+from PIL import Image
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (20, 100, 10)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_missing_original_shows_a_caption(app, tmp_path):
+    app.file_uploader[0].set_value([("beach.jpg", _jpeg(), "image/jpeg")]).run()
+    assert not app.exception
+    [photo] = app.session_state.journal_photos[1]
+
+    shutil.rmtree(tmp_path / "photos")
+    app.selectbox(key="full_photo_day_1").set_value(photo["digest"]).run()
+
+    assert not app.exception
+    assert any("beach.jpg is no longer available" in caption.value for caption in app.caption)
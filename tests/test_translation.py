@@ -0,0 +1,40 @@
+"""Translating a plan in the app keeps it the same trip."""
+import hashlib
+
+from travelbuddy.cache import PlanCache
+from travelbuddy.translation import translation_cache_key
+from travelbuddy.trip_store import TripStore
+
+
+def test_journal_note_survives_translation(app, tmp_path):
+    trip_id = app.session_state.trip["id"]
+    app.text_area(key="journal_notes_day_1").input("Bring the good camera").run()
+
+    app.selectbox(key="translate_to").set_value("Hindi (हिन्दी)")
+    next(button for button in app.button if button.label == "Translate").click().run()
+
+    assert not app.exception
+    assert app.session_state.trip["language"] == "Hindi (हिन्दी)"
+    assert app.session_state.trip["id"] == trip_id
+    assert app.session_state["journal_notes_day_1"] == "Bring the good camera"
+    assert app.text_area(key="journal_notes_day_1").value == "Bring the good camera"
+    store = TripStore(str(tmp_path / "trips.sqlite3"))
+    assert store.load_journals(trip_id) == {1: "Bring the good camera"}
+    assert store.get_trip(trip_id)["language"] == "Hindi (हिन्दी)"
+    assert [trip["id"] for trip in store.list_trips(f"key:{app.query_params['trips']}")] == [trip_id]
+
+
+def test_replanned_days_are_translated_too(app, tmp_path):
+    next(button for button in app.button if button.label == "Rainy Day ☔").click().run()
+    rainy_day = app.session_state.modified_plans[1]
+
+    app.selectbox(key="translate_to").set_value("Hindi (हिन्दी)")
+    next(button for button in app.button if button.label == "Translate").click().run()
+
+    assert not app.exception
+    cache_key = translation_cache_key(hashlib.sha256(rainy_day.encode("utf-8")).hexdigest(), "day", "Hindi")
+    translated = PlanCache(str(tmp_path / "cache.sqlite3")).get(cache_key)
+    assert translated is not None
+    assert app.session_state.modified_plans == {1: translated}
+    store = TripStore(str(tmp_path / "trips.sqlite3"))
+    assert store.load_modified_days(app.session_state.trip["id"]) == {1: translated}
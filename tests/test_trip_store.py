@@ -0,0 +1,16 @@
+"""Saved trips belong to the session that generated them."""
+from travelbuddy.trip_store import TripStore
+
+
+def test_same_plan_in_two_sessions_is_two_trips(new_session, tmp_path):
+    first = new_session()
+    second = new_session()  # same trip details, so the plan comes from the plan cache
+    assert first.session_state.parsed_plan.digest == second.session_state.parsed_plan.digest
+
+    first_id, second_id = first.session_state.trip["id"], second.session_state.trip["id"]
+    assert first_id != second_id
+    store = TripStore(str(tmp_path / "trips.sqlite3"))
+    store.add_expense(first_id, "Cab", 500)
+    assert store.load_expenses(second_id) == []
+    assert [trip["id"] for trip in store.list_trips(f"key:{first.query_params['trips']}")] == [first_id]
+    assert [trip["id"] for trip in store.list_trips(f"key:{second.query_params['trips']}")] == [second_id]
@@ -0,0 +1 @@
+"""Support modules for the TravelBuddy Pro Streamlit app."""
@@ -0,0 +1,226 @@
+"""
+Semantic cache for chatbot answers about a destination.
+
+Questions are embedded offline with a hashing embedding (word and word-pair
+features hashed into a fixed-size vector), so "Is Goa safe at night?" and
+"is it safe in goa at night" land close together without a model. Each
+destination keeps its vectors in one NumPy matrix; a lookup is a single
+matrix-vector product. A close vector is not enough when the questions name
+different things: their distinguishing words (numbers, proper nouns and
+known place names) must be the same too, so "taxi from the airport to Baga
+beach" never gets the answer about Calangute. Answers are kept per
+destination and language. Questions that depend on the user's own itinerary
+or on the conversation so far, and questions asked without a destination,
+are never cached or answered from the cache.
+"""
+import hashlib
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from travelbuddy.cache import canonical_language
+from travelbuddy.metrics import METRICS
+
+DEFAULT_DIMENSIONS = 1024
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_ENTRIES_PER_DESTINATION = 256
+# Questions with fewer content words than this ("is it safe?", "why?") lean on earlier turns.
+MIN_CONTENT_WORDS = 2
+
+_WORD_RX = re.compile(r"\w+")
+_STOPWORDS = frozenset("""
+    i me a an the is are was were be been am do does did can could should would will shall may might must
+    it its this that these those there here what which who whom how when where why
+    to of in on at for from by with about into over during as and or but if so than then
+    any some very much many more most just also please tell know get go going
+""".split())
+# Words that tie a question to this user's trip, dates or conversation.
+_PERSONAL_WORDS = frozenset("""
+    my mine we us our ours ourselves
+    itinerary plan plans planned schedule booked booking
+    today tomorrow tonight yesterday now currently
+""".split())
+_PERSONAL_RX = re.compile(
+    r"\bday\s*\d+\b|\b(first|second|third|last|other|next|previous)\s+(one|day|place|option|stop)\b"
+    r"|^\s*(and|also|then|so|what about|how about|why not)\b|\bthat one\b|\byou (said|mentioned|suggested)\b",
+    re.IGNORECASE,
+)
+# Answers that lean on the itinerary are not reusable for someone else.
+_PLAN_ANSWER_RX = re.compile(r"\byour (itinerary|plan|trip|schedule|hotel|budget)\b|\bday\s*\d+\b", re.IGNORECASE)
+
+
+def _stem(word):
+    # Crude stemming so "beaches" matches "beach" and "visiting" matches "visit".
+    for suffix in ("ing", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _words(text):
+    return [_stem(word) for word in _WORD_RX.findall(text.lower())]
+
+
+def content_words(text):
+    return [word for word in _words(text) if word not in _STOPWORDS]
+
+
+def place_words(names):
+    """
+    The words that single out one of `names` (place names such as the
+    gazetteer's): "baga" from "Baga Beach", but not "beach", which many share.
+    """
+    counts = Counter(word for name in names for word in set(content_words(name)))
+    return frozenset(word for word, count in counts.items() if count == 1)
+
+
+def distinguishing_words(text, places=frozenset(), ignore=frozenset()):
+    """
+    The words two questions must share to have the same answer: numbers,
+    capitalized words other than a sentence's first, and words in `places`.
+    Words in `ignore` (the destination's own name) don't count.
+    """
+    found = set()
+    for sentence in re.split(r"[.!?]+", text):
+        for position, word in enumerate(_WORD_RX.findall(sentence)):
+            stem = _stem(word.lower())
+            if stem in _STOPWORDS or stem in ignore:
+                continue
+            if any(ch.isdigit() for ch in word) or (position and word[:1].isupper()) or stem in places:
+                found.add(stem)
+    return frozenset(found)
+
+
+def _bucket(feature, dimensions):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, 1.0 if value >> 63 else -1.0
+
+
+def embed(text, dimensions=DEFAULT_DIMENSIONS):
+    """A unit-length hashing embedding of the question's content words and word pairs."""
+    words = content_words(text)
+    vector = np.zeros(dimensions, dtype=np.float32)
+    features = [(word, 1.0) for word in words]
+    # Word pairs in sorted order, so word order doesn't matter but combinations do.
+    features += [(" ".join(sorted(pair)), 0.5) for pair in zip(words, words[1:])]
+    for feature, weight in features:
+        index, sign = _bucket(feature, dimensions)
+        vector[index] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def is_personal_question(question):
+    """True if the answer would depend on the user's itinerary, dates or earlier turns."""
+    words = set(_WORD_RX.findall(question.lower()))
+    if words & _PERSONAL_WORDS or _PERSONAL_RX.search(question):
+        return True
+    return len(content_words(question)) < MIN_CONTENT_WORDS
+
+
+class _Destination:
+    """One destination's cached questions: a vector matrix plus distinguishing words, answers and LRU stamps."""
+
+    def __init__(self, capacity, dimensions):
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.questions = [None] * capacity
+        self.words = [None] * capacity
+        self.answers = [None] * capacity
+        self.size = 0
+
+    def match(self, vector, words, threshold):
+        """The closest row with the same distinguishing words and at least `threshold` similarity, as (row, similarity)."""
+        if not self.size:
+            return None, 0.0
+        similarities = self.vectors[:self.size] @ vector
+        candidates = np.flatnonzero(similarities >= threshold)
+        for row in candidates[np.argsort(-similarities[candidates], kind="stable")]:
+            if self.words[row] == words:
+                return int(row), float(similarities[row])
+        return None, 0.0
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe answer cache shared by every session. Each destination holds
+    up to `entries_per_destination` answers; the least recently used one is
+    replaced when it is full. A lookup hits when a cached question for the
+    same destination and language has cosine similarity of at least
+    `threshold` and the same distinguishing words. `place_names` (e.g. the
+    gazetteer's) let lowercase place names count as distinguishing.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, entries_per_destination=DEFAULT_ENTRIES_PER_DESTINATION,
+                 dimensions=DEFAULT_DIMENSIONS, place_names=()):
+        self.threshold = threshold
+        self.entries_per_destination = entries_per_destination
+        self.dimensions = dimensions
+        self.places = place_words(place_names)
+        self._destinations = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def _words(self, destination, question):
+        return distinguishing_words(question, self.places, ignore=frozenset(_words(destination)))
+
+    def lookup(self, destination, language, question):
+        """Returns (answer, similarity) for a cached near-duplicate question, or None."""
+        if not destination.strip():
+            return None
+        if is_personal_question(question):
+            METRICS.inc("travelbuddy_answer_cache_lookups_total", result="personal")
+            return None
+        vector = embed(question, self.dimensions)
+        words = self._words(destination, question)
+        with self._lock:
+            entries = self._destinations.get((destination.strip().lower(), canonical_language(language)))
+            row, similarity = entries.match(vector, words, self.threshold) if entries else (None, 0.0)
+            if row is None:
+                METRICS.inc("travelbuddy_answer_cache_lookups_total", result="miss")
+                return None
+            entries.last_used[row] = self._tick()
+            METRICS.inc("travelbuddy_answer_cache_lookups_total", result="hit")
+            return entries.answers[row], similarity
+
+    def add(self, destination, language, question, answer):
+        """
+        Caches an answer unless there is no destination or the question or the
+        answer is about the user's own trip. Returns True if stored.
+        """
+        if not destination.strip() or is_personal_question(question) or _PLAN_ANSWER_RX.search(answer):
+            return False
+        vector = embed(question, self.dimensions)
+        if not vector.any():
+            return False
+        key = (destination.strip().lower(), canonical_language(language))
+        words = self._words(destination, question)
+        with self._lock:
+            entries = self._destinations.get(key)
+            if entries is None:
+                entries = self._destinations[key] = _Destination(self.entries_per_destination, self.dimensions)
+            row, _ = entries.match(vector, words, self.threshold)
+            if row is None:
+                if entries.size < self.entries_per_destination:
+                    row = entries.size
+                    entries.size += 1
+                else:
+                    row = int(np.argmin(entries.last_used))
+                    METRICS.inc("travelbuddy_answer_cache_evictions_total")
+            entries.vectors[row] = vector
+            entries.questions[row] = question
+            entries.words[row] = words
+            entries.answers[row] = answer
+            entries.last_used[row] = self._tick()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {key: entries.size for key, entries in self._destinations.items()}
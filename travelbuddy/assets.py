@@ -0,0 +1,117 @@
+"""
+Builds the app's static files once, at startup.
+
+Streamlit serves ./static/ at app/static/ when `server.enableStaticServing`
+is on (see .streamlit/config.toml), so the browser fetches and caches these
+files instead of receiving them inline on every rerun.
+"""
+import os
+
+STATIC_DIR = "static"
+STATIC_URL = "app/static"
+WALLPAPER_WIDTHS = (1280, 1920, 2560)
+WALLPAPER_QUALITY = 80
+MARKER_FILE = "marker.png"
+MARKER_SIZE = 128
+DEFAULT_MAP_STYLE = "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json"
+OFFLINE_MAP_STYLE = os.path.join(STATIC_DIR, "basemap", "offline.json")
+
+
+def static_url(path, static_dir=STATIC_DIR):
+    """URL the browser uses for a file inside `static_dir`."""
+    return f"{STATIC_URL}/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+
+
+def _is_fresh(target, source):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def build_wallpaper(source, static_dir=STATIC_DIR, widths=WALLPAPER_WIDTHS, quality=WALLPAPER_QUALITY):
+    """
+    Writes WebP copies of `source` at each width (never upscaled) and returns
+    [(width, url), ...], smallest first. Up-to-date copies are not rebuilt.
+    Returns [] if the source is missing.
+    """
+    if not os.path.exists(source):
+        return []
+    from PIL import Image
+
+    os.makedirs(static_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    with Image.open(source) as image:  # only the header is read here
+        source_width = image.width
+    targets = [width for width in sorted(widths) if width < source_width]
+    if len(targets) < len(widths):
+        targets.append(source_width)
+
+    variants = []
+    image = None
+    for width in targets:
+        target = os.path.join(static_dir, f"{stem}-{width}.webp")
+        if not _is_fresh(target, source):
+            if image is None:
+                image = Image.open(source).convert("RGB")
+            resized = image
+            if width < image.width:
+                resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            resized.save(target, "WEBP", quality=quality, method=6)
+        variants.append((width, static_url(target, static_dir)))
+    return variants
+
+
+def build_marker_icon(static_dir=STATIC_DIR, size=MARKER_SIZE):
+    """Draws the map marker pin into `static_dir` (once) and returns its URL."""
+    target = os.path.join(static_dir, MARKER_FILE)
+    if not os.path.exists(target):
+        from PIL import Image, ImageDraw
+
+        os.makedirs(static_dir, exist_ok=True)
+        scale = 4  # draw large and downsample for smooth edges
+        big = size * scale
+        image = Image.new("RGBA", (big, big), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        radius = big * 0.3
+        cx, cy = big / 2, big * 0.36
+        draw.polygon([(cx - radius * 0.8, cy + radius * 0.55), (cx + radius * 0.8, cy + radius * 0.55), (cx, big - 1)], fill=(214, 40, 57))
+        draw.ellipse([cx - radius, cy - radius, cx + radius, cy + radius], fill=(214, 40, 57))
+        draw.ellipse([cx - radius * 0.4, cy - radius * 0.4, cx + radius * 0.4, cy + radius * 0.4], fill=(255, 255, 255))
+        image.resize((size, size), Image.LANCZOS).save(target, "PNG", optimize=True)
+    return static_url(target, static_dir)
+
+
+def wallpaper_css(variants):
+    """Background CSS that picks the smallest wallpaper at least as wide as the screen."""
+    if not variants:
+        return ""
+    rules = [f'[data-testid="stAppViewContainer"] {{ background-image: url("{variants[0][1]}"); }}']
+    for (previous_width, _), (_, url) in zip(variants, variants[1:]):
+        rules.append(
+            f'@media (min-width: {previous_width + 1}px) {{ '
+            f'[data-testid="stAppViewContainer"] {{ background-image: url("{url}"); }} }}'
+        )
+    return (
+        "<style>\n"
+        '[data-testid="stAppViewContainer"] { background-size: cover; background-repeat: no-repeat; background-attachment: fixed; }\n'
+        + "\n".join(rules)
+        + "\n</style>"
+    )
+
+
+def resolve_map_style(setting, static_dir=STATIC_DIR):
+    """
+    Turns the TRAVELBUDDY_MAP_STYLE setting into a map style URL.
+
+    Empty means the default CartoDB style, "none" means no basemap (None),
+    "offline" means the bundled tile-free style, and a path to a file inside
+    `static_dir` is served from there. Anything else is used as a URL.
+    """
+    setting = (setting or "").strip()
+    if not setting:
+        return DEFAULT_MAP_STYLE
+    if setting.lower() == "none":
+        return None
+    if setting.lower() == "offline":
+        setting = OFFLINE_MAP_STYLE
+    if os.path.exists(setting):
+        return static_url(setting, static_dir)
+    return setting
@@ -0,0 +1,268 @@
+"""
+Generates itineraries for many trips at once, without the Streamlit app.
+
+Trip specs come from CSV or JSONL. Generations run concurrently (bounded by
+an asyncio semaphore, with a token-bucket rate limit on model requests),
+finished trips are appended to a checkpoint file so a rerun skips them, and
+PDFs are rendered in a process pool while later plans are still being
+generated.
+"""
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from travelbuddy.cache import plan_cache_key
+from travelbuddy.llm import LLMError
+from travelbuddy.pdf_export import create_pdf
+from travelbuddy.plan_parser import PlanParseError, parse_plan_text
+from travelbuddy.planner import PLAN_DATE_FORMAT, generate_travel_plan
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_PDF_WORKERS = 2
+DEFAULT_LANGUAGE = "English"
+DEFAULT_BUDGET = "💰💰 Mid-Range"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+
+class TripSpecError(ValueError):
+    """A trip spec is missing fields or has unreadable values."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, holding at most `capacity`.
+    Each `acquire` takes one token, waiting until one is available.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RateLimitedBackend:
+    """
+    Wraps an LLM backend so every model request, including retries and plan
+    repairs, first takes a token from `bucket`. Requests come from worker
+    threads; the bucket lives on the batch's event loop.
+    """
+
+    def __init__(self, backend, bucket, loop):
+        self.backend = backend
+        self.name = getattr(backend, "name", "rate-limited")
+        self._bucket = bucket
+        self._loop = loop
+
+    def acquire(self):
+        asyncio.run_coroutine_threadsafe(self._bucket.acquire(), self._loop).result()
+
+    def model(self, model_name, system_instruction=None):
+        return _RateLimitedModel(self.backend.model(model_name, system_instruction=system_instruction), self)
+
+
+class _RateLimitedModel:
+    def __init__(self, model, backend):
+        self._model = model
+        self._backend = backend
+
+    def generate_content(self, prompt, **kwargs):
+        self._backend.acquire()
+        return self._model.generate_content(prompt, **kwargs)
+
+
+def _split_interests(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value or "").split(";") if v.strip()]
+
+
+def normalize_trip_spec(raw):
+    """
+    Turns one CSV row or JSONL object into the arguments for generate_travel_plan.
+
+    Required: origin, destination, start_date and end_date (YYYY-MM-DD).
+    Optional: id, travelers (default 1), budget, interests (a list, or
+    ";"-separated in CSV) and language. Trips without an id get a stable
+    one derived from their details, so checkpoints survive reruns.
+    """
+    missing = [field for field in ("origin", "destination", "start_date", "end_date") if not raw.get(field)]
+    if missing:
+        raise TripSpecError(f"missing {', '.join(missing)}")
+    try:
+        start = date.fromisoformat(str(raw["start_date"]).strip())
+        end = date.fromisoformat(str(raw["end_date"]).strip())
+        travelers = int(raw.get("travelers") or 1)
+    except ValueError as exc:
+        raise TripSpecError(str(exc)) from exc
+    if end < start:
+        raise TripSpecError("end_date is before start_date")
+    spec = {
+        "origin": str(raw["origin"]).strip(),
+        "destination": str(raw["destination"]).strip(),
+        "start_date_str": start.strftime(PLAN_DATE_FORMAT),
+        "end_date_str": end.strftime(PLAN_DATE_FORMAT),
+        "duration": (end - start).days + 1,
+        "travelers": travelers,
+        "budget": str(raw.get("budget") or DEFAULT_BUDGET).strip(),
+        "interests": _split_interests(raw.get("interests")),
+        "language": str(raw.get("language") or DEFAULT_LANGUAGE).strip(),
+    }
+    trip_id = str(raw.get("id") or "").strip() or plan_cache_key(**spec)[len("plan:"):][:12]
+    return trip_id, spec
+
+
+def output_name(trip_id):
+    """
+    A file name for a trip's outputs. Ids are used as they are when safe;
+    others ("../x", "a/b") have the unsafe characters replaced and a hash
+    of the id appended, so they stay in the output directory and distinct.
+    """
+    name = re.sub(r"[^\w.-]", "_", trip_id).strip(".")
+    if name != trip_id or not name:
+        name = f"{name}-{hashlib.sha256(trip_id.encode('utf-8')).hexdigest()[:8]}"
+    return name
+
+
+def load_trip_specs(path):
+    """Reads trip specs from a .csv or .jsonl file and returns [(trip_id, spec), ...]."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    specs = []
+    for number, raw in enumerate(rows, 1):
+        try:
+            specs.append(normalize_trip_spec(raw))
+        except TripSpecError as exc:
+            raise TripSpecError(f"{path}, trip {number}: {exc}") from exc
+    return specs
+
+
+def load_checkpoint(out_dir):
+    """Trip ids that already finished successfully in an earlier run."""
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+    return done
+
+
+def write_pdf(sections, destination, path):
+    """Process-pool worker: renders one plan's PDF to `path`."""
+    data = create_pdf(sections, destination)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class BatchRunner:
+    """Runs a list of trip specs against one client, writing results to `out_dir`."""
+
+    def __init__(self, client, plan_cache, out_dir, concurrency=DEFAULT_CONCURRENCY,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, pdf_workers=DEFAULT_PDF_WORKERS, plan_format="text",
+                 log=print):
+        self.client = client
+        self.plan_cache = plan_cache
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.pdf_workers = pdf_workers
+        self.plan_format = plan_format
+        self.log = log
+
+    def run(self, specs):
+        """Generates every spec not already in the checkpoint; returns a summary dict."""
+        return asyncio.run(self._run(specs))
+
+    async def _run(self, specs):
+        os.makedirs(self.out_dir, exist_ok=True)
+        done = load_checkpoint(self.out_dir)
+        todo = [(trip_id, spec) for trip_id, spec in specs if trip_id not in done]
+        self.log(f"{len(specs)} trips, {len(specs) - len(todo)} already done, {len(todo)} to generate")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # A burst of up to `concurrency` requests, then the steady per-minute rate. Only requests
+        # that reach the model take a token, so cached plans don't use up the quota.
+        bucket = TokenBucket(self.requests_per_minute / 60.0, capacity=max(1, self.concurrency))
+        client = self.client.with_backend(RateLimitedBackend(self.client.backend, bucket, asyncio.get_running_loop()))
+        pdf_pool = ProcessPoolExecutor(max_workers=self.pdf_workers) if self.pdf_workers else None
+        summary = {"ok": 0, "failed": 0, "skipped": len(specs) - len(todo)}
+        started = time.monotonic()
+        with open(os.path.join(self.out_dir, CHECKPOINT_FILE), "a", encoding="utf-8") as checkpoint:
+            try:
+                await asyncio.gather(*(
+                    self._one(client, trip_id, spec, semaphore, pdf_pool, checkpoint, summary)
+                    for trip_id, spec in todo
+                ))
+            finally:
+                if pdf_pool:
+                    pdf_pool.shutdown()
+        elapsed = time.monotonic() - started
+        summary["seconds"] = round(elapsed, 1)
+        summary["plans_per_minute"] = round(summary["ok"] * 60 / elapsed, 2) if elapsed > 0 else 0.0
+        self.log(f"Done: {summary['ok']} ok, {summary['failed']} failed in {summary['seconds']}s "
+                 f"({summary['plans_per_minute']} plans/minute)")
+        return summary
+
+    async def _one(self, client, trip_id, spec, semaphore, pdf_pool, checkpoint, summary):
+        record = {"id": trip_id}
+        try:
+            async with semaphore:
+                plan_text = await asyncio.to_thread(
+                    generate_travel_plan, client, self.plan_cache, plan_format=self.plan_format, **spec
+                )
+            parsed = parse_plan_text(plan_text)
+            plan_path = os.path.join(self.out_dir, f"{output_name(trip_id)}.md")
+            await asyncio.to_thread(_write_text, plan_path, plan_text)
+            record["plan"] = plan_path
+            if pdf_pool:
+                # The next generation can start while this PDF renders in another process.
+                pdf_path = os.path.join(self.out_dir, f"{output_name(trip_id)}.pdf")
+                await asyncio.get_running_loop().run_in_executor(
+                    pdf_pool, write_pdf, dict(parsed.sections), spec["destination"], pdf_path
+                )
+                record["pdf"] = pdf_path
+            record["status"] = "ok"
+            summary["ok"] += 1
+            self.log(f"[ok] {trip_id}: {spec['origin']} → {spec['destination']}")
+        except Exception as exc:
+            # One bad trip is recorded as failed; the rest of the batch goes on.
+            error = str(exc) if isinstance(exc, (LLMError, PlanParseError, OSError)) else f"{type(exc).__name__}: {exc}"
+            record.update(status="failed", error=error)
+            summary["failed"] += 1
+            self.log(f"[failed] {trip_id}: {error}")
+        checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+        checkpoint.flush()
+
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,192 @@
+"""Two-tier (memory + SQLite) cache for generated plans and other model output."""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from travelbuddy.metrics import METRICS
+
+# Bump when the plan prompt changes so stale plans are not served.
+PLAN_KEY_VERSION = 1
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 256
+
+
+def canonical_language(language):
+    """Reduces a language label like 'Hindi (हिन्दी)' to 'hindi'."""
+    name = re.sub(r"\(.*?\)", "", language or "").strip().lower()
+    return name or "english"
+
+
+def normalize_plan_request(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language):
+    """Returns the canonical form of the inputs to generate_travel_plan."""
+    return {
+        "v": PLAN_KEY_VERSION,
+        "origin": origin.strip().lower(),
+        "destination": destination.strip().lower(),
+        "start": (start_date_str or "").strip(),
+        "end": (end_date_str or "").strip(),
+        "duration": int(duration),
+        "travelers": int(travelers),
+        "budget": budget.strip().lower(),
+        "interests": sorted({i.strip().lower() for i in interests}),
+        "language": canonical_language(language),
+    }
+
+
+def plan_cache_key(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language):
+    """Builds a content-addressed cache key for a travel plan request."""
+    request = normalize_plan_request(
+        origin, destination, start_date_str, end_date_str, duration,
+        travelers, budget, interests, language
+    )
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return "plan:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def variant_cache_key(day_content, reason, language):
+    """Builds the cache key for a re-planned day variant."""
+    payload = json.dumps([day_content.strip(), reason, canonical_language(language)], ensure_ascii=False)
+    return "variant:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    An in-process LRU in front of an on-disk SQLite store.
+
+    Values must be JSON-serialisable. Entries expire after `ttl` seconds
+    (pass `ttl=float("inf")` to `set` to keep an entry forever) and the
+    least recently used entries are evicted once the store grows past
+    `max_bytes`. If the disk store cannot be opened the cache keeps working
+    in memory only.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._conn = self._open(path)
+
+    def _open(self, path):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _expires_at(self, ttl, now):
+        ttl = self.ttl if ttl is None else ttl
+        return None if ttl == float("inf") else now + ttl
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Returns the cached value for `key`, or `default` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count_lookup(key, "memory_hits")
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        if row[1] is None or row[1] > now:
+                            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                            self._conn.commit()
+                            value = json.loads(row[0])
+                            self._remember(key, value, row[1])
+                            self._count_lookup(key, "disk_hits")
+                            return value
+                        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        self._conn.commit()
+                except sqlite3.Error:
+                    pass
+
+            self._count_lookup(key, "misses")
+            return default
+
+    def _count_lookup(self, key, result):
+        self._stats[result] += 1
+        # Keys are "<kind>:<...>", so hit ratios can be told apart per kind of entry.
+        METRICS.inc("travelbuddy_cache_lookups_total", kind=key.split(":", 1)[0], result=result)
+
+    def set(self, key, value, ttl=None):
+        """Stores `value` under `key` in both tiers."""
+        now = time.time()
+        expires_at = self._expires_at(ttl, now)
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._stats["writes"] += 1
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload.encode("utf-8")), expires_at, now),
+                )
+                self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+                self._evict_to_size()
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def _evict_to_size(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so a burst of writes doesn't evict on every call.
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the overall hit ratio."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,259 @@
+"""
+Precomputed plan catalog: plans, packing lists and local guides for the
+most requested trips, generated offline (scripts/build_catalog.py) and
+served without calling Gemini.
+
+The catalog is a single SQLite file. Plans are keyed by the normalized
+trip request minus its dates, so an entry answers any trip with the same
+route, length, group size, budget, interests and language, and plans are
+generated from a prompt without dates so they name none. Texts are
+zlib-compressed. The file records the PLAN_KEY_VERSION it was built for;
+a catalog built for another prompt version is ignored until it is rebuilt.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import product
+
+from travelbuddy.cache import PLAN_KEY_VERSION, canonical_language, normalize_plan_request
+from travelbuddy.llm import LLMError
+from travelbuddy.metrics import METRICS, log_event
+from travelbuddy.plan_parser import PlanParseError, parse_plan_text
+from travelbuddy.planner import generate_travel_plan
+from travelbuddy.toolkit import build_itinerary_context, generate_local_guide, generate_packing_list
+
+# Bump when the file layout or how entries are generated changes.
+CATALOG_FORMAT = 2
+
+# The sidebar's defaults, which most requests use.
+DEFAULT_DURATIONS = (6,)
+DEFAULT_TRAVELERS = (2,)
+DEFAULT_BUDGETS = ("💰💰 Mid-Range",)
+DEFAULT_INTEREST_SETS = (("🧘‍♀️ Wellness", "🍽️ Food"),)
+DEFAULT_LANGUAGES = ("English",)
+DEFAULT_BUILD_WORKERS = 4
+
+
+def catalog_key(origin, destination, duration, travelers, budget, interests, language):
+    """The catalog key for a trip request; like plan_cache_key but without the dates."""
+    request = normalize_plan_request(origin, destination, "", "", duration, travelers, budget, interests, language)
+    del request["start"], request["end"]
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return "catalog:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def guide_key(destination, language):
+    return f"{destination.strip().lower()}:{canonical_language(language)}"
+
+
+def _pack(text):
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def catalog_entries(routes, durations=DEFAULT_DURATIONS, travelers=DEFAULT_TRAVELERS, budgets=DEFAULT_BUDGETS,
+                    interest_sets=DEFAULT_INTEREST_SETS, languages=DEFAULT_LANGUAGES):
+    """Every combination of the given (origin, destination) routes and trip parameters, as trip dicts."""
+    return [
+        {"origin": origin, "destination": destination, "duration": duration, "travelers": group, "budget": budget,
+         "interests": list(interests), "language": language}
+        for (origin, destination), duration, group, budget, interests, language
+        in product(routes, durations, travelers, budgets, interest_sets, languages)
+    ]
+
+
+class PlanCatalog:
+    """
+    Read-only access to a catalog file. The file is opened on first use and
+    reopened when it changes on disk, so a rebuilt catalog is picked up
+    without a restart. A missing, unreadable or stale file behaves as empty.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stamp = None
+        self.meta = {}
+
+    def _connection(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn, self.meta, self._stamp = None, {}, stamp
+            try:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+                meta = dict(conn.execute("SELECT name, value FROM meta"))
+            except sqlite3.Error:
+                return None
+            if meta.get("format") != str(CATALOG_FORMAT) or meta.get("plan_key_version") != str(PLAN_KEY_VERSION):
+                log_event("catalog_stale", path=self.path, version=meta.get("version"))
+                conn.close()
+                return None
+            self._conn, self.meta = conn, meta
+        return self._conn
+
+    def _lookup(self, kind, query, args):
+        with self._lock:
+            conn = self._connection()
+            try:
+                row = conn.execute(query, args).fetchone() if conn is not None else None
+            except sqlite3.Error:
+                row = None
+        METRICS.inc("travelbuddy_catalog_lookups_total", kind=kind, result="hit" if row else "miss")
+        return _unpack(row[0]) if row else None
+
+    def plan(self, origin, destination, duration, travelers, budget, interests, language):
+        """The catalog's plan text for this trip, or None."""
+        key = catalog_key(origin, destination, duration, travelers, budget, interests, language)
+        return self._lookup("plan", "SELECT plan FROM plans WHERE key = ?", (key,))
+
+    def packing_list(self, plan_digest):
+        """The packing list made for the catalog plan with this ParsedPlan.digest, or None."""
+        return self._lookup("packing_list", "SELECT packing_list FROM plans WHERE digest = ?", (plan_digest,))
+
+    def local_guide(self, destination, language):
+        return self._lookup("local_guide", "SELECT guide FROM guides WHERE key = ?", (guide_key(destination, language),))
+
+    @property
+    def version(self):
+        with self._lock:
+            self._connection()
+            return self.meta.get("version")
+
+
+def _create_tables(conn):
+    conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute(
+        "CREATE TABLE plans ("
+        " key TEXT PRIMARY KEY, digest TEXT NOT NULL, origin TEXT NOT NULL, destination TEXT NOT NULL,"
+        " request TEXT NOT NULL, plan BLOB NOT NULL, packing_list BLOB NOT NULL, generated_at REAL NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX plans_digest ON plans (digest)")
+    conn.execute(
+        "CREATE TABLE guides (key TEXT PRIMARY KEY, guide BLOB NOT NULL, generated_at REAL NOT NULL) WITHOUT ROWID"
+    )
+
+
+def _reusable_rows(path, max_age):
+    """Plan and guide rows from an existing catalog that can be copied as they are."""
+    if not os.path.exists(path):
+        return {}, {}
+    oldest = time.time() - max_age if max_age is not None else 0
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        meta = dict(conn.execute("SELECT name, value FROM meta"))
+        if meta.get("format") != str(CATALOG_FORMAT) or meta.get("plan_key_version") != str(PLAN_KEY_VERSION):
+            return {}, {}
+        plans = {row[0]: row for row in conn.execute("SELECT * FROM plans WHERE generated_at >= ?", (oldest,))}
+        guides = {row[0]: row for row in conn.execute("SELECT * FROM guides WHERE generated_at >= ?", (oldest,))}
+        return plans, guides
+    except sqlite3.Error:
+        return {}, {}
+    finally:
+        conn.close()
+
+
+def build_catalog(client, plan_cache, path, entries, version=None, plan_format="text", workers=DEFAULT_BUILD_WORKERS,
+                  refresh=False, max_age=None, log=print):
+    """
+    Generates a plan, packing list and local guide for every entry (see
+    catalog_entries) and writes the catalog to `path`.
+
+    With `refresh`, entries already in the catalog at `path` are copied
+    instead of regenerated unless they are older than `max_age` seconds.
+    Plans are generated without dates, since an entry is served for any
+    start date. Entries whose plan fails to generate or parse are left
+    out. The new file replaces the old one in a single rename, so the app
+    never reads a half-written catalog. Returns a summary dict.
+    """
+    old_plans, old_guides = _reusable_rows(path, max_age) if refresh else ({}, {})
+    version = version or time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    summary = {"plans": 0, "reused": 0, "failed": 0, "guides": 0}
+    write_lock = threading.Lock()
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(tmp_path, check_same_thread=False)
+    _create_tables(conn)
+
+    def build_plan(entry):
+        key = catalog_key(**entry)
+        if key in old_plans:
+            with write_lock:
+                conn.execute("INSERT OR IGNORE INTO plans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", old_plans[key])
+                summary["reused"] += 1
+            return
+        try:
+            plan_text = generate_travel_plan(
+                client, None, start_date_str=None, end_date_str=None, plan_format=plan_format, **entry
+            )
+            parsed = parse_plan_text(plan_text)
+            packing_list = generate_packing_list(client, build_itinerary_context(parsed))
+        except (LLMError, PlanParseError) as exc:
+            with write_lock:
+                summary["failed"] += 1
+            log(f"FAILED {entry['origin']} → {entry['destination']} ({entry['duration']} days): {exc}")
+            return
+        with write_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, parsed.digest, entry["origin"], entry["destination"], json.dumps(entry, ensure_ascii=False),
+                 _pack(plan_text), _pack(packing_list), time.time()),
+            )
+            summary["plans"] += 1
+        log(f"ok {entry['origin']} → {entry['destination']} ({entry['duration']} days)")
+
+    def build_guide(destination, language):
+        key = guide_key(destination, language)
+        if key in old_guides:
+            with write_lock:
+                conn.execute("INSERT OR IGNORE INTO guides VALUES (?, ?, ?)", old_guides[key])
+            return
+        try:
+            guide = generate_local_guide(client, plan_cache, destination, language)
+        except LLMError as exc:
+            log(f"FAILED local guide for {destination} ({language}): {exc}")
+            return
+        with write_lock:
+            conn.execute("INSERT OR REPLACE INTO guides VALUES (?, ?, ?)", (key, _pack(guide), time.time()))
+            summary["guides"] += 1
+
+    guides = {guide_key(e["destination"], e["language"]): (e["destination"], e["language"]) for e in entries}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="catalog") as executor:
+            jobs = [executor.submit(build_plan, entry) for entry in entries]
+            jobs += [executor.submit(build_guide, *guide) for guide in guides.values()]
+            for job in as_completed(jobs):
+                job.result()
+        meta = {
+            "format": CATALOG_FORMAT, "plan_key_version": PLAN_KEY_VERSION, "version": version,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "plan_format": plan_format,
+        }
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(name, str(value)) for name, value in meta.items()])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    summary["version"] = version
+    log_event("catalog_built", path=path, **summary)
+    return summary
@@ -0,0 +1,96 @@
+"""Token-budgeted conversation state for the itinerary chatbot."""
+
+DEFAULT_TOKEN_BUDGET = 8000
+DEFAULT_SUMMARY_TOKENS = 400
+# Rough average for Gemini tokenisers; good enough to stay under a budget.
+CHARS_PER_TOKEN = 4
+
+CHAT_PERSONA = (
+    "You are TravelBuddy, a friendly expert on travel in India. "
+    "Answer the user's questions concisely."
+)
+
+
+def estimate_tokens(text):
+    """Cheap, offline token estimate used to plan each prompt."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def build_system_instruction(itinerary_context=None):
+    """The chatbot's system instruction, with the itinerary installed once if there is one."""
+    if not itinerary_context:
+        return CHAT_PERSONA
+    return (
+        f"{CHAT_PERSONA}\n"
+        "HERE IS THE USER'S ITINERARY FOR CONTEXT:\n"
+        "---\n"
+        f"{itinerary_context}\n"
+        "---\n"
+        "Use it whenever the user's question is about their trip."
+    )
+
+
+class ChatContext:
+    """
+    Keeps every chatbot prompt under `token_budget`.
+
+    The itinerary lives in the system instruction, so it is sent once per
+    request instead of once per remembered turn. Each request carries the
+    newest question/answer pairs that fit in what's left of the budget;
+    pairs that fall out of the window are compacted into a short running
+    summary (trimmed to `summary_tokens`) rather than dropped outright.
+    """
+
+    def __init__(self, system_instruction, token_budget=DEFAULT_TOKEN_BUDGET, summary_tokens=DEFAULT_SUMMARY_TOKENS):
+        self.system_instruction = system_instruction
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.system_tokens = estimate_tokens(system_instruction)
+        self.pairs = []
+        self.summary = ""
+        self.last_prompt_tokens = 0
+
+    def build_contents(self, prompt):
+        """Returns the Gemini `contents` for this turn, compacting old turns to fit the budget."""
+        # Reserve the summary's full allowance so compaction can never push us over budget.
+        fixed = self.system_tokens + estimate_tokens(prompt) + self.summary_tokens
+        available = max(0, self.token_budget - fixed)
+        kept, used = 0, 0
+        for pair in reversed(self.pairs):
+            if used + pair["tokens"] > available:
+                break
+            used += pair["tokens"]
+            kept += 1
+        dropped = self.pairs[:len(self.pairs) - kept]
+        if dropped:
+            self._compact(dropped)
+            self.pairs = self.pairs[len(dropped):]
+
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our earlier conversation: {self.summary}"]})
+            contents.append({"role": "model", "parts": ["Got it."]})
+        for pair in self.pairs:
+            contents.append({"role": "user", "parts": [pair["user"]]})
+            contents.append({"role": "model", "parts": [pair["model"]]})
+        contents.append({"role": "user", "parts": [prompt]})
+        self.last_prompt_tokens = self.system_tokens + estimate_tokens(self.summary) + used + estimate_tokens(prompt)
+        return contents
+
+    def record(self, prompt, answer, usage_metadata=None):
+        """Remembers a finished turn; prefers Gemini's own prompt token count when it's reported."""
+        self.pairs.append({
+            "user": prompt,
+            "model": answer,
+            "tokens": estimate_tokens(prompt) + estimate_tokens(answer),
+        })
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+        if prompt_tokens:
+            self.last_prompt_tokens = prompt_tokens
+
+    def _compact(self, pairs):
+        notes = [f"Q: {pair['user'][:160]} A: {pair['model'][:240]}" for pair in pairs]
+        summary = " | ".join(([self.summary] if self.summary else []) + notes)
+        # Keep the most recent part of the summary when it outgrows its share.
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        self.summary = summary[-max_chars:]
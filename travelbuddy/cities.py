@@ -0,0 +1,18 @@
+"""The Indian cities offered as origins and destinations, with their coordinates."""
+
+# (city, lat, lon)
+CITIES = (
+    ('Mumbai', 19.0760, 72.8777), ('Delhi', 28.6139, 77.2090), ('Bengaluru', 12.9716, 77.5946),
+    ('Chennai', 13.0827, 80.2707), ('Kolkata', 22.5726, 88.3639), ('Hyderabad', 17.3850, 78.4867),
+    ('Pune', 18.5204, 73.8567), ('Ahmedabad', 23.0225, 72.5714), ('Jaipur', 26.9124, 75.7873),
+    ('Goa', 15.2993, 74.1240), ('Kochi', 9.9312, 76.2673), ('Varanasi', 25.3176, 82.9739),
+    ('Agra', 27.1767, 78.0081), ('Rishikesh', 30.0869, 78.2676), ('Shimla', 31.1048, 77.1734),
+    ('Darjeeling', 27.0360, 88.2627), ('Udaipur', 24.5854, 73.6826), ('Amritsar', 31.6340, 74.8723),
+)
+CITY_NAMES = tuple(city for city, _, _ in CITIES)
+_COORDS = {city: (lat, lon) for city, lat, lon in CITIES}
+
+
+def city_coords(city):
+    """Returns (lat, lon) for one of CITY_NAMES; raises KeyError for anything else."""
+    return _COORDS[city]
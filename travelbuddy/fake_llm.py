@@ -0,0 +1,288 @@
+"""
+A deterministic stand-in for Gemini, for running and benchmarking the app
+without network access or an API key.
+
+FakeBackend answers every prompt the app sends (tagged plans, JSON plans,
+section repairs, re-planned days, translations, packing lists, guides and
+chat) with realistic, parseable text. Latency, transient errors, timeouts
+and malformed plans are injected at configurable rates. Outcomes depend
+only on the seed, the prompt and how many times that prompt has been sent,
+so a run can be reproduced, and a retried request can succeed where the
+first attempt failed.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from travelbuddy.cities import CITIES
+from travelbuddy.plan_parser import DAY_HEADER_RX, LOCATION_RX, PLAN_SECTIONS
+
+# Options accepted in TRAVELBUDDY_FAKE_LLM ("days=3,latency=0.2,error_rate=0.1"), with their defaults.
+FAKE_OPTIONS = {
+    "seed": 0,
+    "days": 0,  # 0: as many days as the prompt asks for
+    "locations": 3,  # per day
+    "latency": 0.0,  # median seconds per request
+    "latency_sigma": 0.5,  # spread of the log-normal latency
+    "error_rate": 0.0,  # transient failures (retried by GeminiClient)
+    "timeout_rate": 0.0,
+    "malformed_rate": 0.0,  # plans with a section missing
+    "blocked_rate": 0.0,  # answers without text, like a safety block
+    "chunk_size": 40,  # characters per streamed chunk
+}
+
+_DEFAULT_COORDS = (20.5937, 78.9629)
+_CITY_COORDS = {city.lower(): (lat, lon) for city, lat, lon in CITIES}
+_PLACE_PREFIXES = ("Old", "Royal", "Central", "Heritage", "Sunset", "Lotus", "Riverside", "Hilltop", "Green", "Grand")
+_PLACE_KINDS = ("Fort", "Market", "Temple", "Lake", "Museum", "Garden", "Palace", "Beach", "Bazaar", "Cafe",
+                "Viewpoint", "Gallery")
+_INDOOR_KINDS = ("Museum", "Gallery", "Cafe", "Craft Centre", "Indoor Market", "Library")
+_TRIP_RX = re.compile(r"trip from (.+?) to (.+?)(?:, starting|\. The dates)", re.IGNORECASE)
+_DURATION_RX = re.compile(r"This is a (\d+)-day trip", re.IGNORECASE)
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+
+class FakeResponse:
+    """Mimics a google.generativeai response: `.text` and `.usage_metadata`."""
+
+    def __init__(self, text, usage_metadata=None, blocked=False):
+        self._text = text
+        self.usage_metadata = usage_metadata
+        self.blocked = blocked
+
+    @property
+    def text(self):
+        if self.blocked:
+            raise ValueError("The response was blocked.")
+        return self._text
+
+
+class FakeStream:
+    """Mimics a streamed response: iterating yields chunks, each after its share of the latency."""
+
+    def __init__(self, text, usage_metadata, chunk_size, delay, fail_at=None):
+        self.usage_metadata = usage_metadata
+        self._chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        self._delay = delay / len(self._chunks)
+        self._fail_at = fail_at
+
+    def __iter__(self):
+        for index, chunk in enumerate(self._chunks):
+            if index == self._fail_at:
+                raise ConnectionError("Fake backend: connection reset mid-stream")
+            if self._delay:
+                time.sleep(self._delay)
+            yield FakeResponse(chunk)
+
+
+def parse_fake_options(spec):
+    """Parses "name=value,..." into FAKE_OPTIONS types; raises ValueError for unknown names."""
+    options = dict(FAKE_OPTIONS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in FAKE_OPTIONS:
+            raise ValueError(f"unknown fake backend option {name!r}")
+        options[name] = type(FAKE_OPTIONS[name])(value.strip())
+    return options
+
+
+def _prompt_text(prompt):
+    """The text of a prompt: a string, or the last user turn of a chat `contents` list."""
+    if isinstance(prompt, str):
+        return prompt
+    for turn in reversed(prompt):
+        if isinstance(turn, dict) and turn.get("role") == "user":
+            return " ".join(str(part) for part in turn.get("parts", []))
+    return str(prompt)
+
+
+def _after_rule(prompt):
+    """Everything after the first `---` line in a prompt (the text a translation prompt quotes)."""
+    parts = re.split(r"^\s*---\s*$", prompt, maxsplit=1, flags=re.MULTILINE)
+    return parts[1].strip() if len(parts) > 1 else ""
+
+
+def _between_rules(prompt):
+    """The quoted material between the first pair of `---` lines in a prompt."""
+    parts = re.split(r"^\s*---\s*$", prompt, maxsplit=2, flags=re.MULTILINE)
+    return parts[1].strip("\n") if len(parts) > 2 else ""
+
+
+class FakeModel:
+    def __init__(self, backend, model_name, system_instruction):
+        self.backend = backend
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        return self.backend.respond(prompt, generation_config, stream, (request_options or {}).get("timeout"))
+
+
+class FakeBackend:
+    """LLM backend that never leaves the process. See FAKE_OPTIONS for the knobs."""
+
+    name = "fake"
+
+    def __init__(self, **options):
+        unknown = set(options) - set(FAKE_OPTIONS)
+        if unknown:
+            raise ValueError(f"unknown fake backend options: {', '.join(sorted(unknown))}")
+        self.options = dict(FAKE_OPTIONS, **options)
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec):
+        return cls(**parse_fake_options(spec))
+
+    def model(self, model_name, system_instruction=None):
+        return FakeModel(self, model_name, system_instruction)
+
+    def _rng(self, prompt_text):
+        digest = hashlib.sha256(prompt_text.encode("utf-8", "replace")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.options['seed']}:{digest}:{attempt}")
+
+    def _latency(self, rng):
+        median = self.options["latency"]
+        return median * math.exp(rng.gauss(0, self.options["latency_sigma"])) if median > 0 else 0.0
+
+    def respond(self, prompt, generation_config, stream, timeout):
+        text = _prompt_text(prompt)
+        rng = self._rng(text)
+        delay = self._latency(rng)
+        if rng.random() < self.options["timeout_rate"] or (timeout and delay > timeout):
+            time.sleep(min(delay, timeout or delay))
+            raise TimeoutError("Fake backend: deadline exceeded")
+        failing = rng.random() < self.options["error_rate"]
+        if failing and not stream:
+            time.sleep(delay)
+            raise ConnectionError("Fake backend: service unavailable")
+        answer = self.answer(text, generation_config or {}, rng)
+        usage = _Usage(len(text) // 4, len(answer) // 4)
+        if stream:
+            chunk_size = max(1, self.options["chunk_size"])
+            chunks = max(1, -(-len(answer) // chunk_size))
+            return FakeStream(answer, usage, chunk_size, delay, rng.randrange(chunks) if failing else None)
+        time.sleep(delay)
+        return FakeResponse(answer, usage, blocked=rng.random() < self.options["blocked_rate"])
+
+    # --- Answers ---
+
+    def answer(self, prompt, generation_config, rng):
+        """The text answer for one prompt."""
+        schema = generation_config.get("response_schema") if isinstance(generation_config, dict) else None
+        if schema:
+            return self._json_plan(prompt, list(schema.get("properties", {})), rng)
+        if any(f"[{tag}]" in prompt for tag, _ in PLAN_SECTIONS):
+            return self._tagged_plan(prompt, rng)
+        if "situation has changed" in prompt:
+            return self._modified_days(prompt, rng)
+        if prompt.lstrip().startswith("Translate the following"):
+            # Placeholders and Markdown come back untouched, as the prompt asks.
+            return _after_rule(prompt)
+        if "primary local language" in prompt:
+            return "Hindi"
+        if "packing list" in prompt:
+            return ("**Clothing**\n- Light cotton shirts\n- Comfortable walking shoes\n\n"
+                    "**Toiletries**\n- Sunscreen\n- Insect repellent\n\n"
+                    "**Documents**\n- ID card\n- Booking confirmations\n")
+        if "Know Before You Go" in prompt:
+            return ("1. **Must-Try Local Foods:** Thali, street chaat, filter coffee.\n"
+                    "2. **Useful Phrases:** Namaste (hello), Dhanyavaad (thank you).\n"
+                    "3. **Etiquette:** Remove your shoes before entering temples.\n")
+        return f"Here is a quick tip: {rng.choice(('start early to beat the crowds', 'carry water', 'bargain politely in markets'))}."
+
+    def _trip(self, prompt):
+        trip = _TRIP_RX.search(prompt)
+        destination = trip.group(2).strip() if trip else "India"
+        duration = _DURATION_RX.search(prompt)
+        days = self.options["days"] or (int(duration.group(1)) if duration else 3)
+        return destination, _CITY_COORDS.get(destination.lower(), _DEFAULT_COORDS), days
+
+    def _places(self, rng, base, count, kinds=_PLACE_KINDS):
+        names = set()
+        places = []
+        while len(places) < count:
+            name = f"{rng.choice(_PLACE_PREFIXES)} {rng.choice(kinds)}"
+            if name in names and len(names) < len(_PLACE_PREFIXES) * len(kinds):
+                continue
+            names.add(name)
+            places.append((name, round(base[0] + rng.uniform(-0.05, 0.05), 4), round(base[1] + rng.uniform(-0.05, 0.05), 4)))
+        return places
+
+    def _plan_places(self, base, days, rng):
+        """[(day, places)] for the itinerary, and the places to stay."""
+        itinerary = [(day, self._places(rng, base, self.options["locations"])) for day in range(1, days + 1)]
+        stays = self._places(rng, base, 2, ("Residency", "Heritage Hotel", "Homestay"))
+        return itinerary, stays
+
+    def _tagged_plan(self, prompt, rng):
+        destination, base, days = self._trip(prompt)
+        itinerary, stays = self._plan_places(base, days, rng)
+        markup = "**{}** (day: {}, lat: {:.4f}, lon: {:.4f})"
+        texts = {
+            "summary": f"A relaxed {days}-day trip to {destination}, mixing sights, food and downtime.",
+            "budget": "| Category | Estimated Cost |\n|---|---|\n| Stay | ₹12,000 |\n| Food | ₹6,000 |\n| Transport | ₹4,000 |",
+            "itinerary": "\n\n".join(
+                f"**Day {day}: Exploring {destination}**\n"
+                + "\n".join(f"- Visit {markup.format(name, day, lat, lon)}." for name, lat, lon in places)
+                for day, places in itinerary
+            ),
+            "accommodation": "\n".join(f"- Stay at {markup.format(name, 1, lat, lon)}." for name, lat, lon in stays),
+            "transport": "Take a prepaid taxi from the station and use app cabs or autos to get around.",
+        }
+        wanted = [(tag, key) for tag, key in PLAN_SECTIONS if f"[{tag}]" in prompt]
+        if len(wanted) > 1 and rng.random() < self.options["malformed_rate"]:
+            wanted.remove(rng.choice(wanted))
+        return "\n".join(f"[{tag}]\n{texts[key]}\n" for tag, key in wanted)
+
+    def _json_plan(self, prompt, keys, rng):
+        destination, base, days = self._trip(prompt)
+        itinerary, stays = self._plan_places(base, days, rng)
+        data = {
+            "summary": f"A relaxed {days}-day trip to {destination}, mixing sights, food and downtime.",
+            "budget": [{"category": "Stay", "amount": "₹12,000", "notes": ""}, {"category": "Food", "amount": "₹6,000"}],
+            "itinerary": [
+                {"day": day, "title": f"Exploring {destination}",
+                 "plan": " ".join(f"Visit **{name}**." for name, _, _ in places),
+                 "locations": [{"name": name, "lat": lat, "lon": lon} for name, lat, lon in places]}
+                for day, places in itinerary
+            ],
+            "accommodation": [{"name": name, "description": "Comfortable and central.", "lat": lat, "lon": lon}
+                              for name, lat, lon in stays],
+            "transport": "Take a prepaid taxi from the station and use app cabs or autos to get around.",
+        }
+        data = {key: data[key] for key in keys if key in data}
+        if len(data) > 1 and rng.random() < self.options["malformed_rate"]:
+            data[rng.choice(sorted(data))] = "not what the schema asked for"
+        return json.dumps(data, ensure_ascii=False)
+
+    def _modified_days(self, prompt, rng):
+        original = _between_rules(prompt)
+        days = sorted({int(number) for number in DAY_HEADER_RX.findall(original)}) or [1]
+        location = LOCATION_RX.search(original)
+        base = _DEFAULT_COORDS
+        if location:
+            coords = re.findall(r"-?\d+\.\d+", location.group(2))
+            if len(coords) >= 2:
+                base = (float(coords[0]), float(coords[1]))
+        markup = "**{}** (day: {}, lat: {:.4f}, lon: {:.4f})"
+        return "\n\n".join(
+            f"**Day {day}: An easier day**\n"
+            + "\n".join(f"- Spend time at {markup.format(name, day, lat, lon)}."
+                        for name, lat, lon in self._places(rng, base, 2, _INDOOR_KINDS))
+            for day in days
+        )
@@ -0,0 +1,213 @@
+"""Bundled gazetteer of Indian cities and sights, used to check coordinates from the model."""
+import csv
+import difflib
+import json
+import math
+import os
+import re
+from functools import cached_property
+
+import numpy as np
+
+from travelbuddy.geo import haversine_km
+
+GAZETTEER_VERSION = 1
+DEFAULT_CELL_DEGREES = 0.25
+DEFAULT_MAX_KM = 200.0
+DEFAULT_SNAP_KM = 2.0
+# How far from the model's pin to look for a known place whose name is spelled differently.
+DEFAULT_NEARBY_KM = 5.0
+NAME_SIMILARITY = 0.85
+KINDS = ("city", "poi")
+
+LOCATION_STATUSES = ("ok", "snapped", "flagged")
+
+
+def normalize_place_name(name):
+    """Lowercases a place name and drops punctuation so "Humayun's Tomb" matches "humayuns tomb"."""
+    return " ".join(re.sub(r"[^\w\s]", "", name.lower()).split())
+
+
+def similar_place_names(a, b):
+    """
+    True if two normalized names likely mean the same place: a close spelling
+    ("humayun tomb", "humayuns tomb") or one containing the other's words
+    when those are at least two ("red fort delhi", "red fort").
+    """
+    if a == b or difflib.SequenceMatcher(None, a, b).ratio() >= NAME_SIMILARITY:
+        return True
+    shorter, longer = sorted((set(a.split()), set(b.split())), key=len)
+    return len(shorter) >= 2 and shorter <= longer
+
+
+def _cell_ids(lat, lon, cell_degrees):
+    columns = math.ceil(360 / cell_degrees)
+    rows = np.floor((np.asarray(lat, dtype=np.float64) + 90) / cell_degrees).astype(np.int64)
+    cols = np.floor((np.asarray(lon, dtype=np.float64) + 180) / cell_degrees).astype(np.int64)
+    return rows * columns + cols
+
+
+def build_gazetteer(csv_path, out_dir, cell_degrees=DEFAULT_CELL_DEGREES):
+    """
+    Converts the CSV source into the columnar on-disk format: one .npy file per
+    numeric column (sorted by grid cell, so a cell range is a contiguous slice)
+    plus meta.json with names and cities.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    lat = np.array([float(r["lat"]) for r in rows], dtype=np.float32)
+    lon = np.array([float(r["lon"]) for r in rows], dtype=np.float32)
+    cells = _cell_ids(lat, lon, cell_degrees)
+    order = np.argsort(cells, kind="stable")
+    cities = sorted({r["city"] for r in rows})
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "lat.npy"), lat[order])
+    np.save(os.path.join(out_dir, "lon.npy"), lon[order])
+    np.save(os.path.join(out_dir, "cell.npy"), cells[order])
+    np.save(os.path.join(out_dir, "kind.npy"), np.array([KINDS.index(rows[i]["kind"]) for i in order], dtype=np.uint8))
+    np.save(os.path.join(out_dir, "city.npy"), np.array([cities.index(rows[i]["city"]) for i in order], dtype=np.uint16))
+    meta = {
+        "version": GAZETTEER_VERSION,
+        "cell_degrees": cell_degrees,
+        "names": [rows[i]["name"] for i in order],
+        "cities": cities,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=0)
+    return len(rows)
+
+
+class Gazetteer:
+    """
+    Read-only, memory-mapped gazetteer with a grid index.
+
+    Nothing is read from disk until the first lookup. Numeric columns are
+    memory-mapped, and rows are sorted by grid cell so `near` only touches
+    the cells that overlap the search radius.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _column(self, name):
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+    @cached_property
+    def meta(self):
+        with open(os.path.join(self.directory, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    @cached_property
+    def lat(self):
+        return self._column("lat")
+
+    @cached_property
+    def lon(self):
+        return self._column("lon")
+
+    @cached_property
+    def cells(self):
+        return self._column("cell")
+
+    @cached_property
+    def kinds(self):
+        return self._column("kind")
+
+    @cached_property
+    def names(self):
+        return self.meta["names"]
+
+    @cached_property
+    def _name_index(self):
+        index = {}
+        for i, name in enumerate(self.names):
+            index.setdefault(normalize_place_name(name), []).append(i)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def near(self, lat, lon, radius_km):
+        """Row indices within `radius_km` of a point, nearest first."""
+        cell_degrees = self.meta["cell_degrees"]
+        columns = math.ceil(360 / cell_degrees)
+        dlat = radius_km / 110.574
+        dlon = radius_km / max(111.320 * math.cos(math.radians(lat)), 1e-6)
+        low = _cell_ids(lat - dlat, lon - dlon, cell_degrees)
+        high = _cell_ids(lat + dlat, lon + dlon, cell_degrees)
+        first_row, last_row = int(low // columns), int(high // columns)
+        first_col, last_col = int(low % columns), int(high % columns)
+        starts = np.arange(first_row, last_row + 1) * columns + first_col
+        bounds = np.searchsorted(self.cells, np.stack([starts, starts + (last_col - first_col) + 1]))
+        candidates = np.concatenate([np.arange(a, b) for a, b in bounds.T]) if bounds.size else np.empty(0, dtype=np.int64)
+        if candidates.size == 0:
+            return candidates
+        distances = haversine_km(self.lat[candidates], self.lon[candidates], lat, lon)
+        keep = distances <= radius_km
+        return candidates[keep][np.argsort(distances[keep], kind="stable")]
+
+    def find(self, name, lat, lon, radius_km):
+        """Index of the entry named `name` closest to (lat, lon) within `radius_km`, or -1."""
+        matches = self._name_index.get(normalize_place_name(name))
+        if not matches:
+            return -1
+        matches = np.asarray(matches)
+        distances = haversine_km(self.lat[matches], self.lon[matches], lat, lon)
+        best = int(np.argmin(distances))
+        return int(matches[best]) if distances[best] <= radius_km else -1
+
+    def find_near(self, name, lat, lon, radius_km):
+        """Index of the nearest entry within `radius_km` of (lat, lon) whose name is similar to `name`, or -1."""
+        wanted = normalize_place_name(name)
+        for i in self.near(lat, lon, radius_km):
+            if similar_place_names(wanted, normalize_place_name(self.names[i])):
+                return int(i)
+        return -1
+
+
+def validate_locations(locations, gazetteer, dest_lat, dest_lon, max_km=DEFAULT_MAX_KM, snap_km=DEFAULT_SNAP_KM,
+                       nearby_km=DEFAULT_NEARBY_KM):
+    """
+    Checks a locations table (name, day, lat, lon, ...) against the destination in bulk.
+
+    Returns a copy with `dist_km` and `status` columns. Places the gazetteer
+    knows, by exact name near the destination or by a similar name within
+    `nearby_km` of the model's pin, are "snapped" to their known coordinates
+    when the model's are more than `snap_km` off. Unknown places with
+    impossible coordinates or more than `max_km` from the destination are
+    "flagged". Everything else is "ok".
+    """
+    result = locations.copy()
+    lat = result["lat"].to_numpy(dtype=np.float64, copy=True)
+    lon = result["lon"].to_numpy(dtype=np.float64, copy=True)
+    status = np.full(len(result), "ok", dtype=object)
+
+    matched = np.zeros(len(result), dtype=bool)
+    if gazetteer is not None and len(result):
+        known = np.array([gazetteer.find(name, dest_lat, dest_lon, max_km) for name in result["name"]], dtype=np.int64)
+        with np.errstate(invalid="ignore"):
+            plausible = (np.abs(lat) <= 90) & (np.abs(lon) <= 180) & (haversine_km(lat, lon, dest_lat, dest_lon) <= max_km)
+        for row in np.flatnonzero((known < 0) & plausible):
+            known[row] = gazetteer.find_near(result["name"].iat[row], lat[row], lon[row], nearby_km)
+        matched = known >= 0
+        if matched.any():
+            rows = np.flatnonzero(matched)
+            known_lat = np.asarray(gazetteer.lat[known[rows]], dtype=np.float64)
+            known_lon = np.asarray(gazetteer.lon[known[rows]], dtype=np.float64)
+            off = ~(haversine_km(lat[rows], lon[rows], known_lat, known_lon) <= snap_km)
+            lat[rows[off]] = known_lat[off]
+            lon[rows[off]] = known_lon[off]
+            status[rows[off]] = "snapped"
+
+    with np.errstate(invalid="ignore"):
+        distance = haversine_km(lat, lon, dest_lat, dest_lon)
+        impossible = ~np.isfinite(lat) | ~np.isfinite(lon) | (np.abs(lat) > 90) | (np.abs(lon) > 180)
+        flagged = ~matched & (impossible | ~(distance <= max_km))
+    status[flagged] = "flagged"
+
+    result["lat"] = lat
+    result["lon"] = lon
+    result["dist_km"] = np.round(distance, 1)
+    result["status"] = status
+    return result
@@ -0,0 +1,209 @@
+"""
+Group expense ledger: columnar storage with running aggregates, and a
+settle-up that uses as few transfers as possible.
+
+Amounts are kept in integer paise so totals, shares and transfers add up
+exactly.
+"""
+from array import array
+
+EXPENSE_CATEGORIES = ("Food", "Transport", "Stay", "Activities", "Shopping", "Other")
+# Above this many travelers with non-zero balances the exact settle-up
+# (2**n states) gives way to the greedy one.
+MAX_EXACT_SETTLE = 12
+
+
+def to_paise(amount):
+    return int(round(float(amount) * 100))
+
+
+def all_travelers(travelers):
+    """Participant bitmask for everyone."""
+    return (1 << travelers) - 1
+
+
+def split_shares(amount_paise, participants):
+    """
+    Splits an amount between the travelers in a bitmask. Returns
+    {traveler: paise}; the leftover paise go to the first participants so the
+    shares add up exactly.
+    """
+    members = [i for i in range(participants.bit_length()) if participants >> i & 1]
+    base, extra = divmod(amount_paise, len(members))
+    return {member: base + (1 if n < extra else 0) for n, member in enumerate(members)}
+
+
+class ExpenseLedger:
+    """
+    Expenses stored column by column (item, amount, payer, category, day,
+    participants). Adding an expense updates the totals, the per-category
+    and per-day sums and every traveler's balance, so reading any of them
+    never rescans the expenses.
+    """
+
+    def __init__(self, travelers=1):
+        self.travelers = max(1, int(travelers))
+        self.clear()
+
+    def clear(self):
+        self.items = []
+        self.amounts = array("q")
+        self.payers = array("b")
+        self.categories = []
+        self.days = array("h")  # 0 = not tied to a day
+        self.participants = array("q")
+        self.total = 0
+        self.by_category = {}
+        self.by_day = {}
+        self._balances = [0] * self.travelers
+
+    @classmethod
+    def from_records(cls, records, travelers=1):
+        """Builds a ledger from dicts as returned by TripStore.load_expenses."""
+        ledger = cls(travelers)
+        for record in records:
+            ledger.add(
+                record["item"], record["amount"], payer=record.get("payer") or 0,
+                category=record.get("category") or "Other", day=record.get("day"),
+                participants=record.get("participants"),
+            )
+        return ledger
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def resize(self, travelers):
+        """Changes the group size; never drops below the travelers the expenses already name."""
+        used = max([p + 1 for p in self.payers] + [mask.bit_length() for mask in self.participants] + [1])
+        travelers = max(int(travelers), used)
+        if travelers > self.travelers:
+            self._balances.extend([0] * (travelers - self.travelers))
+        else:
+            del self._balances[travelers:]
+        self.travelers = travelers
+
+    def add(self, item, amount, payer=0, category="Other", day=None, participants=None):
+        """Records one expense. `participants` is a bitmask of who shares it (default: everyone)."""
+        amount_paise = to_paise(amount)
+        if participants is None:
+            participants = all_travelers(self.travelers)
+        needed = max(payer + 1, participants.bit_length())
+        if needed > self.travelers:
+            self.resize(needed)
+        self.items.append(item)
+        self.amounts.append(amount_paise)
+        self.payers.append(payer)
+        self.categories.append(category)
+        self.days.append(day or 0)
+        self.participants.append(participants)
+        self.total += amount_paise
+        self.by_category[category] = self.by_category.get(category, 0) + amount_paise
+        if day:
+            self.by_day[day] = self.by_day.get(day, 0) + amount_paise
+        self._balances[payer] += amount_paise
+        for member, share in split_shares(amount_paise, participants).items():
+            self._balances[member] -= share
+
+    def record(self, index):
+        """One expense as a dict (amount in rupees), as stored by TripStore.add_expense."""
+        return {
+            "item": self.items[index], "amount": self.amounts[index] / 100, "payer": self.payers[index],
+            "category": self.categories[index], "day": self.days[index] or None,
+            "participants": self.participants[index],
+        }
+
+    def page(self, number, size):
+        """The `number`-th page (from 0) of expenses, newest first, as (index, record) pairs."""
+        end = len(self) - number * size
+        return [(i, self.record(i)) for i in range(end - 1, max(end - size, 0) - 1, -1)]
+
+    def page_count(self, size):
+        return max(1, -(-len(self) // size))
+
+    def balances(self):
+        """Per traveler: paid minus share, in paise (positive = is owed money)."""
+        return list(self._balances)
+
+    def settle_up(self):
+        """Transfers that square everyone's balance, as (from, to, paise) tuples."""
+        return settle_up(self._balances)
+
+
+def _greedy_transfers(people, balances):
+    """Largest debtor pays largest creditor until everyone is square."""
+    debtors = sorted((balances[p], p) for p in people if balances[p] < 0)
+    creditors = sorted(((balances[p], p) for p in people if balances[p] > 0), reverse=True)
+    transfers = []
+    d = c = 0
+    debts = [-b for b, _ in debtors]
+    credits = [b for b, _ in creditors]
+    while d < len(debtors) and c < len(creditors):
+        amount = min(debts[d], credits[c])
+        transfers.append((debtors[d][1], creditors[c][1], amount))
+        debts[d] -= amount
+        credits[c] -= amount
+        if not debts[d]:
+            d += 1
+        if not credits[c]:
+            c += 1
+    return transfers
+
+
+def settle_up(balances):
+    """
+    Fewest transfers that bring every balance (paise) to zero.
+
+    A group whose balances sum to zero can always be squared with one
+    transfer fewer than its size, so the minimum is (people with a non-zero
+    balance) minus (the most disjoint zero-sum groups they split into). That
+    split is found exactly with a DP over subsets for up to MAX_EXACT_SETTLE
+    people; beyond that the whole group is settled greedily.
+    """
+    people = [p for p, balance in enumerate(balances) if balance]
+    n = len(people)
+    if n == 0:
+        return []
+    if n > MAX_EXACT_SETTLE:
+        return _greedy_transfers(people, balances)
+
+    full = (1 << n) - 1
+    sums = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + balances[people[low.bit_length() - 1]]
+    # best[mask]: most zero-sum groups that the people in `mask` can be split into,
+    # adding people one at a time and closing a group whenever the running sum is zero.
+    best = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        top = 0
+        rest = mask
+        while rest:
+            low = rest & -rest
+            top = max(top, best[mask ^ low])
+            rest ^= low
+        best[mask] = top + (1 if sums[mask] == 0 else 0)
+
+    # Walk back to an order of people whose zero prefixes mark the groups.
+    order = []
+    mask = full
+    while mask:
+        bonus = 1 if sums[mask] == 0 else 0
+        rest = mask
+        while rest:
+            low = rest & -rest
+            if best[mask ^ low] + bonus == best[mask]:
+                break
+            rest ^= low
+        order.append(low)
+        mask ^= low
+    order.reverse()
+
+    transfers = []
+    group, running = [], 0
+    for bit in order:
+        group.append(people[bit.bit_length() - 1])
+        running += balances[group[-1]]
+        if running == 0:
+            transfers.extend(_greedy_transfers(group, balances))
+            group = []
+    return transfers
@@ -0,0 +1,351 @@
+"""
+Process-wide Gemini client with deadlines, retries, hedged requests, coalescing and priorities.
+
+The client talks to models through a backend: GeminiBackend by default, or
+the offline FakeBackend from travelbuddy.fake_llm (see create_backend).
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from travelbuddy.metrics import METRICS, log_event
+from travelbuddy.scheduling import PRIORITY_FOREGROUND, PRIORITY_NAMES, PriorityLimiter, SingleFlight
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE_SECONDS = 1.0
+DEFAULT_BACKOFF_MAX_SECONDS = 20.0
+MAX_CACHED_MODELS = 16
+LLM_BACKENDS = ("gemini", "fake")
+
+
+class LLMError(Exception):
+    """Base class for failures talking to the language model."""
+
+
+class LLMConfigError(LLMError):
+    """The client could not be configured (e.g. the API key is missing)."""
+
+
+class LLMTimeoutError(LLMError):
+    """A request did not finish within its deadline, even after retries."""
+
+
+class LLMTransientError(LLMError):
+    """A retryable failure (rate limit, 5xx, network) that outlasted the retries."""
+
+
+class LLMResponseError(LLMError):
+    """The model answered but returned no usable text (e.g. a blocked response)."""
+
+
+class GeminiBackend:
+    """
+    The google.generativeai backend. A backend only has to provide
+    `model(model_name, system_instruction)`, returning an object whose
+    `generate_content(prompt, generation_config=, stream=, request_options=)`
+    behaves like GenerativeModel's.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key):
+        if not api_key:
+            raise LLMConfigError("Google API Key not found.")
+        import google.generativeai as genai
+        try:
+            genai.configure(api_key=api_key)
+        except Exception as exc:
+            raise LLMConfigError(str(exc)) from exc
+        self._genai = genai
+
+    def model(self, model_name, system_instruction=None):
+        return self._genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+def create_backend(name=None, api_key=None, options=None):
+    """
+    Returns the backend called `name`: "gemini" (the default) or "fake", the
+    offline stand-in configured by an `options` string such as
+    "latency=0.3,error_rate=0.1" (see travelbuddy.fake_llm.FAKE_OPTIONS).
+    """
+    name = (name or "gemini").strip().lower()
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    if name == "fake":
+        from travelbuddy.fake_llm import FakeBackend
+        try:
+            return FakeBackend.from_spec(options)
+        except ValueError as exc:
+            raise LLMConfigError(str(exc)) from exc
+    raise LLMConfigError(f"Unknown LLM backend {name!r}; use one of {', '.join(LLM_BACKENDS)}.")
+
+
+def _is_timeout(exc):
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return isinstance(exc, TimeoutError)
+    return isinstance(exc, (TimeoutError, google_exceptions.DeadlineExceeded))
+
+
+def _is_transient(exc):
+    if isinstance(exc, (ConnectionError, TimeoutError, LLMTransientError, LLMTimeoutError)):
+        return True
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return False
+    return isinstance(exc, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+    ))
+
+
+def _as_llm_error(exc):
+    if isinstance(exc, LLMError):
+        return exc
+    if _is_timeout(exc):
+        return LLMTimeoutError(str(exc))
+    if _is_transient(exc):
+        return LLMTransientError(str(exc))
+    return LLMError(str(exc))
+
+
+def _usage_count(usage, field):
+    try:
+        return int(getattr(usage, field, 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _record_call(kind, model_name, priority, outcome, seconds, usage):
+    """Records one finished model call: latency histogram, token counters and a JSON event."""
+    priority = PRIORITY_NAMES.get(priority, priority)
+    METRICS.observe("travelbuddy_llm_request_seconds", seconds, kind=kind, outcome=outcome, priority=priority)
+    prompt_tokens = _usage_count(usage, "prompt_token_count")
+    output_tokens = _usage_count(usage, "candidates_token_count")
+    if prompt_tokens:
+        METRICS.inc("travelbuddy_llm_tokens_total", prompt_tokens, direction="prompt", model=model_name)
+    if output_tokens:
+        METRICS.inc("travelbuddy_llm_tokens_total", output_tokens, direction="output", model=model_name)
+    log_event("llm_call", kind=kind, model=model_name, priority=priority, outcome=outcome,
+              seconds=round(seconds, 4), prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+
+
+def _request_key(model_name, system_instruction, prompt, generation_config):
+    payload = repr((model_name, system_instruction, prompt, generation_config))
+    return hashlib.sha256(payload.encode("utf-8", "replace")).hexdigest()
+
+
+def response_text(response):
+    """Returns `response.text`, raising LLMResponseError for blocked or empty answers."""
+    try:
+        text = response.text
+    except ValueError as exc:
+        raise LLMResponseError(f"The model returned no text: {exc}") from exc
+    if not text or not text.strip():
+        raise LLMResponseError("The model returned an empty response.")
+    return text
+
+
+class GeminiClient:
+    """
+    Owns the GenerativeModel instances shared by every session.
+
+    Each attempt gets its own deadline (`timeout`), transient failures are
+    retried with exponential backoff and full jitter, and when `hedge_after`
+    is set a duplicate request is sent if the first one hasn't answered
+    within that many seconds; whichever finishes first wins. Hedging trades
+    extra quota for a shorter tail, so it is off by default.
+
+    Identical non-streamed requests that overlap are sent once and share the
+    answer (see `coalesce`). With `max_concurrent` set, at most that many
+    requests run at once, and waiting requests start in `priority` order.
+
+    Models come from `backend` (GeminiBackend(api_key) if None).
+    """
+
+    def __init__(self, api_key=None, model_name=DEFAULT_MODEL, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE_SECONDS,
+                 backoff_max=DEFAULT_BACKOFF_MAX_SECONDS, hedge_after=None, max_concurrent=None, backend=None):
+        self.backend = backend if backend is not None else GeminiBackend(api_key)
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._hedge_pool = None
+        self._flights = SingleFlight()
+        self.limiter = PriorityLimiter(max_concurrent) if max_concurrent else None
+
+    def with_backend(self, backend):
+        """A client with the same settings and request scheduler that gets its models from `backend`."""
+        client = GeminiClient(model_name=self.model_name, timeout=self.timeout, max_retries=self.max_retries,
+                              backoff_base=self.backoff_base, backoff_max=self.backoff_max,
+                              hedge_after=self.hedge_after, backend=backend)
+        client.limiter = self.limiter
+        return client
+
+    def model(self, model_name=None, system_instruction=None):
+        """Returns a cached model for this name and system instruction."""
+        key = (model_name or self.model_name, system_instruction)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self.backend.model(key[0], system_instruction=system_instruction)
+                self._models[key] = model
+                while len(self._models) > MAX_CACHED_MODELS:
+                    self._models.popitem(last=False)
+            else:
+                self._models.move_to_end(key)
+            return model
+
+    def generate(self, prompt, **kwargs):
+        """Generates a response and returns its text. See `generate_response` for options."""
+        return response_text(self.generate_response(prompt, **kwargs))
+
+    def coalesce(self, key, fn):
+        """
+        Runs `fn()` unless a call with the same `key` is already in flight, in
+        which case its result is shared. Returns (result, shared).
+        """
+        result, shared = self._flights.do(key, fn)
+        if shared:
+            METRICS.inc("travelbuddy_llm_coalesced_total")
+        return result, shared
+
+    @contextmanager
+    def _slot(self, priority):
+        if self.limiter is None:
+            yield
+            return
+        queued = time.perf_counter()
+        with self.limiter.slot(priority):
+            METRICS.observe("travelbuddy_llm_queue_seconds", time.perf_counter() - queued,
+                            priority=PRIORITY_NAMES.get(priority, priority))
+            yield
+
+    def generate_response(self, prompt, model_name=None, system_instruction=None, generation_config=None,
+                          timeout=None, max_retries=None, hedge_after=None, priority=PRIORITY_FOREGROUND):
+        """Generates a response with retries (and hedging, if enabled); raises LLMError subclasses."""
+        name = model_name or self.model_name
+        model = self.model(name, system_instruction)
+        timeout = self.timeout if timeout is None else timeout
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+
+        def attempt():
+            with self._slot(priority):
+                return model.generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    request_options={"timeout": timeout},
+                )
+
+        def call():
+            started = time.perf_counter()
+            outcome = "ok"
+            response = None
+            try:
+                if hedge_after:
+                    response = self._with_retries(lambda: self._hedged(attempt, hedge_after), max_retries)
+                else:
+                    response = self._with_retries(attempt, max_retries)
+                return response
+            except LLMError as exc:
+                outcome = type(exc).__name__
+                raise
+            finally:
+                _record_call("generate", name, priority, outcome, time.perf_counter() - started,
+                             getattr(response, "usage_metadata", None))
+
+        key = _request_key(name, system_instruction, prompt, generation_config)
+        return self.coalesce(key, call)[0]
+
+    def stream(self, prompt, model_name=None, system_instruction=None, generation_config=None,
+               timeout=None, max_retries=None, priority=PRIORITY_FOREGROUND):
+        """
+        Yields response text chunks as they arrive, holding a scheduler slot until the stream ends.
+        Failures are only retried before the first chunk; after that they are raised as LLMError.
+        """
+        name = model_name or self.model_name
+        model = self.model(name, system_instruction)
+        timeout = self.timeout if timeout is None else timeout
+        max_retries = self.max_retries if max_retries is None else max_retries
+        call_started = time.perf_counter()
+        for attempt in range(max_retries + 1):
+            started = False
+            response = None
+            try:
+                with self._slot(priority):
+                    response = model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                        stream=True,
+                        request_options={"timeout": timeout},
+                    )
+                    for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            continue
+                        if not started:
+                            started = True
+                            METRICS.observe("travelbuddy_llm_first_chunk_seconds", time.perf_counter() - call_started,
+                                            model=name)
+                        yield text
+                _record_call("stream", name, priority, "ok", time.perf_counter() - call_started,
+                             getattr(response, "usage_metadata", None))
+                return
+            except Exception as exc:
+                if started or not _is_transient(exc) or attempt == max_retries:
+                    error = _as_llm_error(exc)
+                    _record_call("stream", name, priority, type(error).__name__,
+                                 time.perf_counter() - call_started, None)
+                    raise error from exc
+            METRICS.inc("travelbuddy_llm_retries_total", kind="stream")
+            time.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _with_retries(self, call, max_retries=None):
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                return call()
+            except Exception as exc:
+                if not _is_transient(exc) or attempt == max_retries:
+                    raise _as_llm_error(exc) from exc
+            METRICS.inc("travelbuddy_llm_retries_total", kind="generate")
+            time.sleep(self._backoff(attempt))
+
+    def _hedged(self, call, hedge_after):
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+        pending = {self._hedge_pool.submit(call)}
+        done, pending = wait(pending, timeout=hedge_after)
+        if not done:
+            pending.add(self._hedge_pool.submit(call))
+        first_error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    # The slower duplicate keeps running; its result is simply discarded.
+                    return future.result()
+                first_error = first_error or future.exception()
+            if not pending:
+                raise first_error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
@@ -0,0 +1,213 @@
+"""
+In-process instrumentation: counters and latency histograms, exported in
+the Prometheus text format (as a file or a small HTTP endpoint), plus
+structured JSON event logs and an optional cProfile dump per rerun.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; wide enough for a sub-millisecond parse and a minute-long plan.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+EVENT_LOGGER = "travelbuddy.events"
+
+event_logger = logging.getLogger(EVENT_LOGGER)
+_runs = threading.local()
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and histograms, keyed by metric name and labels."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Adds `value` to a counter (Prometheus convention: names end in `_total`)."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Records one observation (usually seconds) in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, then sum and count.
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes how long the `with` block took, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def counter_total(self, name):
+        """A counter summed over all its label values."""
+        with self._lock:
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+
+    def render_prometheus(self):
+        """The current values in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        lines = []
+        typed = set()
+        for (name, label_key), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(label_key)} {value}")
+        for (name, label_key), histogram in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(label_key, [('le', repr(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(label_key, [('le', '+Inf')])} {histogram[-1]}")
+            lines.append(f"{name}_sum{_format_labels(label_key)} {histogram[-2]}")
+            lines.append(f"{name}_count{_format_labels(label_key)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Writes the text format to `path` atomically (e.g. for node_exporter's textfile collector)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+# Shared by every module in the process.
+METRICS = Metrics()
+
+
+def log_event(event, **fields):
+    """Logs one structured event as a JSON line on the `travelbuddy.events` logger."""
+    if event_logger.isEnabledFor(logging.INFO):
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        event_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def configure_event_log(path):
+    """Sends JSON events to `path` (one object per line). Safe to call more than once."""
+    path = os.path.abspath(path)
+    for handler in event_logger.handlers:
+        if getattr(handler, "baseFilename", None) == path:
+            return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    event_logger.addHandler(handler)
+    event_logger.setLevel(logging.INFO)
+    event_logger.propagate = False
+
+
+def serve_metrics(port, metrics=METRICS, host="0.0.0.0"):
+    """Serves `/metrics` from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class RerunTimer:
+    """
+    Times one Streamlit script run, and profiles it with cProfile when
+    `profile_dir` is set (one .prof file per run, readable with pstats or
+    snakeviz).
+
+    A run cut short by `st.rerun()` never reaches `finish`; it is finished
+    (as interrupted) when the next run on the same thread starts.
+    """
+
+    def __init__(self, profile_dir=None, metrics=METRICS):
+        previous = getattr(_runs, "timer", None)
+        if previous is not None:
+            previous.finish(interrupted=True)
+        _runs.timer = self
+        self.metrics = metrics
+        self.profile_dir = profile_dir
+        self._profiler = None
+        if profile_dir:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._profiler = profiler
+            except ValueError:
+                pass  # another session's run is being profiled right now
+        self._started = time.perf_counter()
+
+    def finish(self, interrupted=False, **fields):
+        """Records the run's duration and writes its profile. Returns the duration in seconds."""
+        if getattr(_runs, "timer", None) is self:
+            _runs.timer = None
+        seconds = time.perf_counter() - self._started
+        self.metrics.observe("travelbuddy_rerun_seconds", seconds, interrupted=str(interrupted).lower())
+        profile_path = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile_path = os.path.join(self.profile_dir, f"rerun-{time.time_ns()}.prof")
+            self._profiler.dump_stats(profile_path)
+            self._profiler = None
+        log_event("rerun", seconds=round(seconds, 4), interrupted=interrupted, profile=profile_path, **fields)
+        return seconds
@@ -0,0 +1,96 @@
+"""
+PDF export of a finished plan. Importing this module loads fpdf, so the app
+only imports it when a PDF is actually requested.
+"""
+import os
+from functools import lru_cache
+
+from fpdf import FPDF
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The first font found is the primary one; the rest are glyph fallbacks for other Indic scripts.
+PDF_FONT_FILES = [
+    ('NotoSans', os.path.join(PROJECT_ROOT, 'fonts', 'NotoSansDevanagari-Regular.ttf')),
+    ('NotoSansBengali', os.path.join(PROJECT_ROOT, 'fonts', 'NotoSansBengali-Regular.ttf')),
+    ('NotoSansTelugu', os.path.join(PROJECT_ROOT, 'fonts', 'NotoSansTelugu-Regular.ttf')),
+]
+
+
+@lru_cache(maxsize=None)
+def load_pdf_fonts():
+    """Finds the bundled PDF fonts and whether text shaping is available, once per process."""
+    fonts = tuple((family, path) for family, path in PDF_FONT_FILES if os.path.exists(path))
+    try:
+        import uharfbuzz  # noqa: F401
+        shaping = True
+    except ImportError:
+        shaping = False
+    return fonts, shaping
+
+
+class PDF(FPDF):
+    def __init__(self, fonts=(), shaping=False):
+        super().__init__()
+        # Fonts are registered once per document rather than on every page header.
+        self.unicode_font = None
+        for family, path in fonts:
+            self.add_font(family, '', path)
+        if fonts:
+            self.unicode_font = fonts[0][0]
+            if len(fonts) > 1:
+                self.set_fallback_fonts([family for family, _ in fonts[1:]])
+            if shaping:
+                self.set_text_shaping(True)
+
+    def use_font(self, size, style=''):
+        if self.unicode_font:
+            self.set_font(self.unicode_font, size=size)
+        else:
+            self.set_font('Arial', style, size=size)
+
+    def safe_text(self, text):
+        # Core fonts are latin-1 only; Unicode fonts get the text untouched.
+        if self.unicode_font:
+            return text
+        return text.encode('latin-1', 'replace').decode('latin-1')
+
+    def header(self):
+        self.use_font(12)
+        self.cell(0, 10, 'Your TravelBuddy Itinerary', 0, 1, 'C')
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.use_font(8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    def chapter_title(self, title):
+        self.use_font(14, 'B')
+        self.cell(0, 10, self.safe_text(title), 0, 1, 'L')
+        self.ln(4)
+
+    def chapter_body(self, body):
+        self.use_font(11)
+        self.multi_cell(0, 7, self.safe_text(body))
+        self.ln()
+
+
+def create_pdf(plan_data, destination):
+    """Renders a plan (anything indexable by section key) to PDF bytes."""
+    fonts, shaping = load_pdf_fonts()
+    pdf = PDF(fonts, shaping)
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf_plan_data = {
+        f"Trip to {destination}": plan_data['summary'],
+        "Budget Allocation": plan_data['budget'],
+        "Day-by-Day Itinerary": plan_data['itinerary'],
+        "Accommodation Suggestions": plan_data['accommodation'],
+        "Transportation Tips": plan_data['transport']
+    }
+    for title, body in pdf_plan_data.items():
+        pdf.chapter_title(title.replace("_", " ").title())
+        pdf.chapter_body(body.strip())
+
+    return bytes(pdf.output())
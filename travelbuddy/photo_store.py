@@ -0,0 +1,120 @@
+"""Content-addressed on-disk store for journal photos, with thumbnails made in the background."""
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_THUMB_SIZE = 320
+DEFAULT_WORKERS = 2
+THUMB_QUALITY = 75
+
+
+class PhotoStore:
+    """
+    Photos are stored once per content hash under `root/originals/`, and a
+    small WebP thumbnail per photo under `root/thumbs/`.
+
+    `put` streams an upload to disk in chunks while hashing it, so only one
+    chunk is in memory at a time; identical uploads share one file.
+    Thumbnails are made by a small thread pool and the journal shows
+    only those, opening an original only when asked to.
+    """
+
+    def __init__(self, root, thumb_size=DEFAULT_THUMB_SIZE, workers=DEFAULT_WORKERS):
+        self.root = root
+        self.thumb_size = thumb_size
+        self._originals = os.path.join(root, "originals")
+        self._thumbs = os.path.join(root, "thumbs")
+        os.makedirs(self._originals, exist_ok=True)
+        os.makedirs(self._thumbs, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._pending = {}
+        # Digests whose thumbnail failed (e.g. not a decodable image); they aren't retried.
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def original_path(self, digest):
+        return os.path.join(self._originals, digest[:2], digest)
+
+    def thumbnail_path(self, digest):
+        return os.path.join(self._thumbs, digest[:2], digest + ".webp")
+
+    def put(self, fileobj):
+        """Stores a file-like object and returns its SHA-256 digest; its thumbnail is queued."""
+        hasher = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self._originals, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(fileobj, "seek"):
+                    fileobj.seek(0)
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    out.write(chunk)
+            digest = hasher.hexdigest()
+            target = self.original_path(digest)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.request_thumbnail(digest)
+        return digest
+
+    def request_thumbnail(self, digest):
+        """
+        Queues a thumbnail unless it exists, is already being made or failed
+        before; returns the future or None.
+        """
+        if os.path.exists(self.thumbnail_path(digest)):
+            return None
+        with self._lock:
+            if digest in self._failed:
+                return None
+            future = self._pending.get(digest)
+            if future is not None:
+                return future
+            future = self._pool.submit(self._make_thumbnail, digest)
+            self._pending[digest] = future
+        # Outside the lock: a job that has already finished runs the callback right here.
+        future.add_done_callback(lambda done, d=digest: self._finished(d, done))
+        return future
+
+    def _finished(self, digest, future):
+        with self._lock:
+            self._pending.pop(digest, None)
+            if future.exception() is not None:
+                self._failed.add(digest)
+
+    def thumbnail_failed(self, digest):
+        """Whether a thumbnail could not be made for this photo."""
+        with self._lock:
+            return digest in self._failed
+
+    def _make_thumbnail(self, digest):
+        from PIL import Image, ImageOps
+
+        target = self.thumbnail_path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with Image.open(self.original_path(digest)) as image:
+            # For JPEGs, draft() decodes at a reduced scale, so a 12 MP photo is never fully decoded.
+            image.draft("RGB", (self.thumb_size, self.thumb_size))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((self.thumb_size, self.thumb_size))
+            tmp_path = target + ".tmp"
+            image.save(tmp_path, "WEBP", quality=THUMB_QUALITY)
+        os.replace(tmp_path, target)
+        return target
+
+    def thumbnail(self, digest):
+        """The thumbnail path if it is ready, else None (and the thumbnail is queued)."""
+        path = self.thumbnail_path(digest)
+        if os.path.exists(path):
+            return path
+        self.request_thumbnail(digest)
+        return None
@@ -0,0 +1,268 @@
+"""Parsing helpers for the tagged plan format produced by Gemini."""
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+
+from travelbuddy.metrics import METRICS, log_event
+
+# Section tags in the order the prompt asks for them, with the keys used by parse_plan.
+PLAN_SECTIONS = (
+    ("TRIP_SUMMARY", "summary"),
+    ("BUDGET_ALLOCATION", "budget"),
+    ("DAY_BY_DAY_ITINERARY", "itinerary"),
+    ("ACCOMMODATION_SUGGESTIONS", "accommodation"),
+    ("TRANSPORTATION_TIPS", "transport"),
+)
+PLAN_SECTION_TAGS = tuple(f"[{tag}]" for tag, _ in PLAN_SECTIONS)
+
+_SECTION_KEYS = dict(PLAN_SECTIONS)
+_TAG_RX = re.compile(r"\[(" + "|".join(tag for tag, _ in PLAN_SECTIONS) + r")\]")
+_MAX_TAG_LEN = max(len(tag) for tag in PLAN_SECTION_TAGS)
+
+DAY_HEADER_RX = re.compile(r"\*\*\s*Day\s*(\d+)", re.IGNORECASE)
+LOCATION_RX = re.compile(r"\*\*([\w\s,'-]+\w)\*\*\s*\((.*?)\)", re.IGNORECASE)
+_LOC_DAY_RX = re.compile(r"day:\s*(\d+)", re.IGNORECASE)
+_LOC_LAT_RX = re.compile(r"lat:\s*([\d.-]+)", re.IGNORECASE)
+_LOC_LON_RX = re.compile(r"lon:\s*([\d.-]+)", re.IGNORECASE)
+LOCATION_COLUMNS = ["name", "day", "lat", "lon"]
+
+# A day header that is still arriving ("**  Da") must not be scanned past.
+_DAY_HOLDBACK = 16
+
+
+class IncrementalPlanParser:
+    """
+    Splits a plan into sections and days while it is still being streamed.
+
+    `feed` returns the events completed by the new chunk: `("section", key,
+    content)` once the next section tag arrives, and `("day", number, content)`
+    once the next `**Day N` header (or the end of the itinerary) arrives.
+    `close` flushes whatever is left at the end of the stream.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.sections = {}
+        self._section = None
+        self._section_start = 0
+        self._tag_scan = 0
+        self._day_start = None
+        self._day_scan = 0
+
+    def feed(self, chunk):
+        """Adds a chunk of streamed text and returns the events it completed."""
+        self.text += chunk
+        events = []
+        while True:
+            match = _TAG_RX.search(self.text, self._tag_scan)
+            if match is None:
+                break
+            self._close_section(match.start(), events)
+            self._section = _SECTION_KEYS[match.group(1)]
+            self._section_start = self._tag_scan = self._day_scan = match.end()
+            self._day_start = None
+        self._scan_days(len(self.text), events, final=False)
+        self._tag_scan = max(self._tag_scan, len(self.text) - _MAX_TAG_LEN + 1)
+        return events
+
+    def close(self):
+        """Ends the stream and returns the events for the trailing section."""
+        events = []
+        self._close_section(len(self.text), events)
+        self._section = None
+        return events
+
+    @property
+    def missing_sections(self):
+        """Section keys that have not been received (yet)."""
+        return [key for _, key in PLAN_SECTIONS if key not in self.sections]
+
+    def _scan_days(self, end, events, final):
+        if self._section != "itinerary":
+            return
+        for match in DAY_HEADER_RX.finditer(self.text, self._day_scan, end):
+            if self._day_start is not None:
+                self._emit_day(self._day_start, match.start(), events)
+            self._day_start = match.start()
+            self._day_scan = match.start() + 1
+        if final:
+            if self._day_start is not None:
+                self._emit_day(self._day_start, end, events)
+                self._day_start = None
+        else:
+            self._day_scan = max(self._day_scan, end - _DAY_HOLDBACK)
+
+    def _emit_day(self, start, end, events):
+        content = self.text[start:end].strip()
+        match = DAY_HEADER_RX.match(content)
+        if content and match:
+            events.append(("day", int(match.group(1)), content))
+
+    def _close_section(self, end, events):
+        if self._section is None:
+            return
+        self._scan_days(end, events, final=True)
+        content = self.text[self._section_start:end]
+        self.sections[self._section] = content
+        events.append(("section", self._section, content))
+
+
+class PlanParseError(ValueError):
+    """Raised when a plan is missing section tags or has them out of order."""
+
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__(f"Plan is missing or misorders sections: {', '.join(self.missing)}")
+
+
+def find_locations(text):
+    """Returns (name, day, lat, lon) tuples for every well-formed `**Name** (day: X, lat: .., lon: ..)` in `text`."""
+    locations = []
+    for name, details in LOCATION_RX.findall(text):
+        day_match = _LOC_DAY_RX.search(details)
+        lat_match = _LOC_LAT_RX.search(details)
+        lon_match = _LOC_LON_RX.search(details)
+        if not (day_match and lat_match and lon_match):
+            continue
+        try:
+            locations.append((name.strip(), int(day_match.group(1)), float(lat_match.group(1)), float(lon_match.group(1))))
+        except ValueError:
+            continue
+    return locations
+
+
+def extract_sections(text):
+    """
+    Returns {key: content} for every section tag found in `text`, in any
+    order; content runs to the next tag. Unlike parse_plan_text this never
+    fails, so a damaged plan can be salvaged section by section.
+    """
+    matches = list(_TAG_RX.finditer(text))
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.setdefault(_SECTION_KEYS[match.group(1)], text[match.end():end])
+    return sections
+
+
+def join_sections(sections):
+    """Writes sections back out as tagged text in the canonical order (sections that are missing are skipped)."""
+    return "".join(f"[{tag}]{sections[key]}" for tag, key in PLAN_SECTIONS if key in sections)
+
+
+def split_days(itinerary):
+    """Maps each day number to its `**Day N` block; the first block for a day wins."""
+    days = {}
+    headers = list(DAY_HEADER_RX.finditer(itinerary))
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(itinerary)
+        days.setdefault(int(match.group(1)), itinerary[match.start():end].strip())
+    return days
+
+
+@dataclass(frozen=True)
+class ParsedPlan:
+    """
+    An immutable, parsed travel plan.
+
+    Built once when a plan arrives and reused on every rerun: `sections`
+    holds the five tagged sections, `days` maps day numbers to their
+    itinerary block and `location_records` holds every location as
+    (name, day, lat, lon, section). Indexing (`plan["summary"]`) reads a
+    section, matching the dict parse_plan used to return.
+    """
+
+    sections: MappingProxyType
+    days: MappingProxyType
+    location_records: tuple
+
+    @classmethod
+    def from_sections(cls, sections):
+        """Builds the day index and locations table from already-split sections."""
+        missing = [key for _, key in PLAN_SECTIONS if key not in sections]
+        if missing:
+            raise PlanParseError(missing)
+        records = tuple(
+            record + (section,)
+            for section in ("itinerary", "accommodation")
+            for record in find_locations(sections[section])
+        )
+        return cls(
+            sections=MappingProxyType({key: sections[key] for _, key in PLAN_SECTIONS}),
+            days=MappingProxyType(split_days(sections["itinerary"])),
+            location_records=records,
+        )
+
+    def __getitem__(self, key):
+        return self.sections[key]
+
+    def to_text(self):
+        """The plan in its tagged text form; parse_plan_text(plan.to_text()) gives back an equal plan."""
+        return join_sections(self.sections)
+
+    @cached_property
+    def digest(self):
+        """SHA-256 of the section texts; identifies this plan in caches."""
+        payload = json.dumps([self.sections[key] for _, key in PLAN_SECTIONS], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @cached_property
+    def locations(self):
+        """All locations as a DataFrame with a `section` column; treat it as read-only."""
+        import pandas as pd
+        return pd.DataFrame(list(self.location_records), columns=LOCATION_COLUMNS + ["section"])
+
+    @cached_property
+    def day_numbers(self):
+        """Sorted day numbers that have at least one location."""
+        return sorted({record[1] for record in self.location_records})
+
+    def day_locations(self, day_num):
+        """Itinerary locations tagged with `day_num`."""
+        locations = self.locations
+        return locations[(locations["section"] == "itinerary") & (locations["day"] == day_num)]
+
+    def section_locations(self, section):
+        """Locations found in one section."""
+        locations = self.locations
+        return locations[locations["section"] == section]
+
+
+def parse_plan_text(plan_text):
+    """Parses a tagged plan in a single scan over its section tags; raises PlanParseError."""
+    started = time.perf_counter()
+    try:
+        return _parse_sections(plan_text)
+    except PlanParseError as exc:
+        for key in exc.missing:
+            METRICS.inc("travelbuddy_plan_parse_failures_total", section=key)
+        log_event("plan_parse_failed", sections=exc.missing, chars=len(plan_text))
+        raise
+    finally:
+        METRICS.observe("travelbuddy_plan_parse_seconds", time.perf_counter() - started)
+
+
+def _parse_sections(plan_text):
+    tags = {}
+    for match in _TAG_RX.finditer(plan_text):
+        tags.setdefault(_SECTION_KEYS[match.group(1)], match)
+    missing = [key for _, key in PLAN_SECTIONS if key not in tags]
+    if missing:
+        raise PlanParseError(missing)
+    ordered = [tags[key] for _, key in PLAN_SECTIONS]
+    misordered = [
+        PLAN_SECTIONS[i + 1][1]
+        for i, (cur, nxt) in enumerate(zip(ordered, ordered[1:]))
+        if nxt.start() < cur.end()
+    ]
+    if misordered:
+        raise PlanParseError(misordered)
+    sections = {}
+    for i, (_, key) in enumerate(PLAN_SECTIONS):
+        end = ordered[i + 1].start() if i + 1 < len(ordered) else len(plan_text)
+        sections[key] = plan_text[ordered[i].end():end]
+    return ParsedPlan.from_sections(sections)
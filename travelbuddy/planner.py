@@ -0,0 +1,212 @@
+"""
+The planning core, usable without Streamlit: prompt building, plan
+generation and location extraction. The app and the batch CLI both call
+these functions; PDF export lives in travelbuddy.pdf_export.
+"""
+from travelbuddy.cache import plan_cache_key
+from travelbuddy.metrics import METRICS, log_event
+from travelbuddy.plan_parser import (
+    LOCATION_COLUMNS, PLAN_SECTIONS, PlanParseError, extract_sections, find_locations,
+    join_sections, parse_plan_text,
+)
+from travelbuddy.scheduling import PRIORITY_FOREGROUND
+from travelbuddy.structured_plan import (
+    SECTION_INSTRUCTIONS, SECTION_KEYS, load_plan_json, render_plan_text, validate_plan_data,
+)
+from travelbuddy.structured_plan import generation_config as structured_generation_config
+
+PLAN_DATE_FORMAT = "%B %d, %Y"
+
+
+def extract_locations(text):
+    """Extracts place names, days, and coordinates from the itinerary text."""
+    import pandas as pd
+
+    locations_found = find_locations(text)
+    if not locations_found:
+        return pd.DataFrame(columns=LOCATION_COLUMNS)
+    return pd.DataFrame(locations_found, columns=LOCATION_COLUMNS)
+
+
+# --- Plan Generation ---
+PLAN_FORMATS = ("text", "json")
+
+# The format asked for under each tag, in prompt order.
+PLAN_SECTION_FORMATS = {
+    "summary": "A brief, engaging summary.",
+    "budget": "A Markdown table for the budget.",
+    "itinerary": """A detailed day-by-day plan. For each specific point of interest (like a monument, restaurant, or park), YOU MUST format it as: **Name of Place** (day: X, lat: XX.XXXX, lon: YY.YYYY).
+        Example: The plan is to visit **Baga Beach** (day: 1, lat: 15.5560, lon: 73.7517).""",
+    "accommodation": """List 2-3 accommodation options. For each, use the same format as above, using the arrival day (day: 1).
+        Example: Stay at **Taj Fort Aguada Resort & Spa** (day: 1, lat: 15.4957, lon: 73.7667).""",
+    "transport": "Provide brief advice.",
+}
+
+
+def _trip_brief(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language):
+    # Without dates (catalog plans, served for any start date) the plan must not depend on them.
+    if start_date_str:
+        when = f", starting on {start_date_str} and ending on {end_date_str}."
+    else:
+        when = ". The dates are not known yet: do not mention dates, weekdays, months or seasons."
+    return f"""
+        You are an expert travel planner named TravelBuddy. Your response must be in {language}.
+        Create a complete travel plan for a trip from {origin} to {destination}{when}
+        This is a {duration}-day trip for {travelers} people with a {budget} budget, focusing on {', '.join(interests)}.
+"""
+
+
+def build_plan_prompt(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language,
+                      sections=None):
+    """
+    Builds the tagged-format prompt used for full travel plans. With
+    `sections` (a list of section keys) only those sections are asked for,
+    to repair a plan that came back without them.
+    """
+    brief = _trip_brief(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language)
+    if sections is None:
+        sections, intro = list(PLAN_SECTION_FORMATS), "Your response MUST use the following specific tags and format:"
+    else:
+        intro = "The rest of the plan is already written. Respond with ONLY these sections, using these specific tags and format:"
+    blocks = "".join(f"\n        [{tag}]\n        {PLAN_SECTION_FORMATS[key]}\n" for tag, key in PLAN_SECTIONS if key in sections)
+    return f"{brief}\n        {intro}\n{blocks}        "
+
+
+def build_structured_prompt(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests,
+                            language, sections=SECTION_KEYS):
+    """Builds the prompt for JSON-mode plans (or for just `sections` of one)."""
+    brief = _trip_brief(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language)
+    fields = "\n".join(f"        - {SECTION_INSTRUCTIONS[key]}" for key in sections)
+    return f"""{brief}
+        Respond with a JSON object matching the response schema, with these fields:
+{fields}
+        Write every text field in {language}. Coordinates are decimal degrees.
+        """
+
+
+def repair_plan_text(client, plan_text, trip, priority=PRIORITY_FOREGROUND):
+    """
+    Fixes a tagged plan that parse_plan_text would reject. Sections that are
+    out of order are reordered; sections that are missing or empty are asked
+    for again on their own instead of regenerating the whole plan. Returns
+    the repaired text, or the original text if it could not be repaired.
+    """
+    sections = extract_sections(plan_text)
+    missing = [key for _, key in PLAN_SECTIONS if not sections.get(key, "").strip()]
+    if missing:
+        answer = extract_sections(client.generate(build_plan_prompt(**trip, sections=missing), priority=priority))
+        for key in missing:
+            if answer.get(key, "").strip():
+                sections[key] = answer[key]
+        _record_repair("text", missing, [key for key in missing if not sections.get(key, "").strip()])
+    if any(not sections.get(key, "").strip() for _, key in PLAN_SECTIONS):
+        return plan_text
+    return join_sections(sections)
+
+
+def generate_structured_plan(client, trip, priority=PRIORITY_FOREGROUND):
+    """
+    Generates a plan in JSON mode and renders it to tagged text. Sections
+    that fail validation are requested again on their own, once; any still
+    unusable after that are left out, so parse_plan_text reports them.
+    """
+    answer = client.generate(build_structured_prompt(**trip), generation_config=structured_generation_config(),
+                             priority=priority)
+    plan, bad = validate_plan_data(load_plan_json(answer), trip["duration"])
+    if bad:
+        answer = client.generate(build_structured_prompt(**trip, sections=bad),
+                                 generation_config=structured_generation_config(bad), priority=priority)
+        repaired, still_bad = validate_plan_data(load_plan_json(answer), trip["duration"], keys=bad)
+        plan.update(repaired)
+        _record_repair("json", bad, still_bad)
+    return render_plan_text(plan)
+
+
+def _record_repair(mode, requested, failed):
+    for key in requested:
+        METRICS.inc("travelbuddy_plan_repairs_total", mode=mode, section=key,
+                    outcome="failed" if key in failed else "ok")
+    log_event("plan_repair", mode=mode, sections=requested, failed=failed)
+
+
+def generate_travel_plan(client, plan_cache, origin, destination, start_date_str, end_date_str, duration,
+                         travelers, budget, interests, language, on_chunk=None, on_cache_hit=None, plan_format="text",
+                         catalog=None):
+    """
+    Generates a personalized travel plan with `client` (a GeminiClient).
+
+    Plans are looked up in and saved to `plan_cache` (may be None). If
+    `on_chunk` is given the response is streamed and each piece of text is
+    passed to it as it arrives; `on_cache_hit` is called when a saved plan is
+    returned instead. Raises LLMError if Gemini fails after retries.
+
+    If `catalog` (a PlanCatalog) holds a precomputed plan for the same route,
+    length, group, budget, interests and language, that plan is served the
+    same way as a cached one, whatever the dates.
+
+    With `plan_format="json"` Gemini fills a response schema instead and the
+    result is rendered to the same tagged text (JSON answers are not
+    streamed; `on_chunk` gets the finished plan). Either way, sections that
+    come back missing or malformed are requested again on their own.
+
+    Identical requests already in flight (say, two sessions planning the same
+    Delhi → Goa trip) are not sent again: the later caller waits for the
+    first one's plan and receives it as a single chunk.
+    """
+    if plan_format not in PLAN_FORMATS:
+        raise ValueError(f"plan_format must be one of {', '.join(PLAN_FORMATS)}")
+    trip = {
+        "origin": origin, "destination": destination, "start_date_str": start_date_str, "end_date_str": end_date_str,
+        "duration": duration, "travelers": travelers, "budget": budget, "interests": interests, "language": language,
+    }
+    cache_key = plan_cache_key(**trip)
+    cached_plan = plan_cache.get(cache_key) if plan_cache is not None else None
+    if cached_plan is not None:
+        if on_cache_hit:
+            on_cache_hit()
+        if on_chunk:
+            on_chunk(cached_plan)
+        return cached_plan
+    if catalog is not None:
+        catalog_plan = catalog.plan(origin, destination, duration, travelers, budget, interests, language)
+        if catalog_plan is not None:
+            if on_cache_hit:
+                on_cache_hit()
+            if on_chunk:
+                on_chunk(catalog_plan)
+            return catalog_plan
+
+    def produce():
+        if plan_format == "json":
+            text = generate_structured_plan(client, trip)
+            if on_chunk:
+                on_chunk(text)
+        elif on_chunk:
+            chunks = []
+            for chunk in client.stream(build_plan_prompt(**trip)):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            text = "".join(chunks)
+        else:
+            text = client.generate(build_plan_prompt(**trip))
+        parses = _parses(text)
+        if not parses and plan_format == "text":
+            text = repair_plan_text(client, text, trip)
+            parses = _parses(text)
+        # Only cache plans that parse_plan can read, so a malformed answer isn't replayed.
+        if plan_cache is not None and parses:
+            plan_cache.set(cache_key, text)
+        return text
+
+    plan_text, shared = client.coalesce(cache_key, produce)
+    if shared and on_chunk:
+        on_chunk(plan_text)
+    return plan_text
+
+
+def _parses(plan_text):
+    try:
+        parse_plan_text(plan_text)
+    except PlanParseError:
+        return False
+    return True
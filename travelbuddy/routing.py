@@ -0,0 +1,85 @@
+"""Orders a day's stops into a short walking/driving route."""
+import numpy as np
+
+from travelbuddy.geo import haversine_km
+
+DEFAULT_MAX_PASSES = 50
+
+
+def distance_matrix(lat, lon):
+    """All-pairs great-circle distances (km) between the given points as an N x N array."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def nearest_neighbor_order(dist, start=0):
+    """Greedy route: from `start`, always go to the closest unvisited stop."""
+    n = len(dist)
+    order = np.empty(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    current = start
+    for i in range(n):
+        order[i] = current
+        visited[current] = True
+        if i < n - 1:
+            current = int(np.argmin(np.where(visited, np.inf, dist[current])))
+    return order
+
+
+def two_opt(dist, order, fix_start=True, max_passes=DEFAULT_MAX_PASSES):
+    """
+    Improves an open route by reversing segments while that shortens it.
+
+    The open path is treated as a closed tour through a dummy stop that is
+    zero km from everything, so the usual 2-opt move applies unchanged. For
+    each segment start, the gains for every segment end are computed in one
+    vectorised step and the best one is applied.
+    """
+    n = len(order)
+    if n < 4:
+        return np.asarray(order, dtype=np.intp)
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = dist
+    tour = np.concatenate(([n], order)).astype(np.intp)
+    first = 2 if fix_start else 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(first, n):
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:]
+            d = np.roll(tour, -1)[i + 1:]
+            gain = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+            j = int(np.argmin(gain))
+            if gain[j] < -1e-9:
+                tour[i:i + j + 2] = tour[i:i + j + 2][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour[1:]
+
+
+def route_order(lat, lon, start=0, max_passes=DEFAULT_MAX_PASSES):
+    """Returns (order, leg_km, total_km) for visiting every point once, starting at `start`."""
+    n = len(lat)
+    if n == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0), 0.0
+    dist = distance_matrix(lat, lon)
+    order = two_opt(dist, nearest_neighbor_order(dist, start), max_passes=max_passes)
+    legs = np.concatenate(([0.0], dist[order[:-1], order[1:]]))
+    return order, legs, float(legs.sum())
+
+
+def order_day_route(locations, start=0):
+    """
+    Reorders a locations table (with lat/lon columns) into a short route.
+
+    Returns (ordered copy with `stop` and `leg_km` columns, total km). The
+    first stop the model listed is kept as the starting point.
+    """
+    if len(locations) < 2:
+        ordered = locations.assign(stop=np.arange(1, len(locations) + 1), leg_km=0.0)
+        return ordered, 0.0
+    order, legs, total = route_order(locations["lat"].to_numpy(), locations["lon"].to_numpy(), start=start)
+    ordered = locations.iloc[order].assign(stop=np.arange(1, len(order) + 1), leg_km=np.round(legs, 1))
+    return ordered, total
@@ -0,0 +1,103 @@
+"""Process-wide request coalescing and priority scheduling for model calls."""
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Lower numbers go first.
+PRIORITY_INTERACTIVE = 0  # chat turns: someone is waiting on every word
+PRIORITY_FOREGROUND = 1   # plans and re-plans the user just asked for
+PRIORITY_BACKGROUND = 2   # toolkit jobs and speculative prefetches
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_FOREGROUND: "foreground",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls that overlap in time.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running wait for and share its result (or exception) instead of
+    making their own call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Returns (result, shared); `shared` is True if another caller's result was reused."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class PriorityLimiter:
+    """
+    Allows at most `slots` calls at once. When calls are waiting, a free
+    slot goes to the highest priority (lowest number), then to the earliest
+    arrival. Calls already running are never interrupted.
+    """
+
+    def __init__(self, slots):
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        self.slots = slots
+        self._active = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_FOREGROUND):
+        """Blocks until this call may run, and holds a slot for the duration of the `with` block."""
+        entry = (priority, next(self._order))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            while self._active >= self.slots or self._waiting[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # Another slot may still be free for the next waiter in line.
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def stats(self):
+        """Running calls and waiting calls per priority."""
+        with self._cond:
+            waiting = {}
+            for priority, _ in self._waiting:
+                waiting[priority] = waiting.get(priority, 0) + 1
+            return {"active": self._active, "slots": self.slots, "waiting": waiting}
@@ -0,0 +1,241 @@
+"""
+Structured (JSON) plans: the response schema Gemini is asked to fill, a
+validator that reports which sections are unusable, and rendering to the
+tagged text format the rest of the app reads.
+"""
+import json
+import re
+
+from travelbuddy.plan_parser import PLAN_SECTIONS, join_sections
+
+SECTION_KEYS = tuple(key for _, key in PLAN_SECTIONS)
+
+_LOCATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "lat": {"type": "number"},
+        "lon": {"type": "number"},
+    },
+    "required": ["name", "lat", "lon"],
+}
+
+SECTION_SCHEMAS = {
+    "summary": {"type": "string"},
+    "budget": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "category": {"type": "string"},
+                "amount": {"type": "string"},
+                "notes": {"type": "string"},
+            },
+            "required": ["category", "amount"],
+        },
+    },
+    "itinerary": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "day": {"type": "integer"},
+                "title": {"type": "string"},
+                "plan": {"type": "string"},
+                "locations": {"type": "array", "items": _LOCATION_SCHEMA},
+            },
+            "required": ["day", "title", "plan", "locations"],
+        },
+    },
+    "accommodation": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "description": {"type": "string"},
+                "lat": {"type": "number"},
+                "lon": {"type": "number"},
+            },
+            "required": ["name", "description", "lat", "lon"],
+        },
+    },
+    "transport": {"type": "string"},
+}
+
+# What each field should hold; used in the prompt alongside the schema.
+SECTION_INSTRUCTIONS = {
+    "summary": "summary: a brief, engaging summary of the trip.",
+    "budget": "budget: one row per spending category, with an estimated amount and optional notes.",
+    "itinerary": (
+        "itinerary: one entry per day, numbered from 1. `plan` is the day's Markdown plan in which every "
+        "point of interest (monument, restaurant, park, ...) is written in bold as **Name**; list each of "
+        "them in `locations` with the same name and its coordinates. Do not start `plan` with a day heading."
+    ),
+    "accommodation": "accommodation: 2-3 places to stay, each with a short description and coordinates.",
+    "transport": "transport: brief Markdown advice on getting there and getting around.",
+}
+
+
+def response_schema(keys=SECTION_KEYS):
+    """The JSON schema for a response holding the given sections."""
+    return {
+        "type": "object",
+        "properties": {key: SECTION_SCHEMAS[key] for key in keys},
+        "required": list(keys),
+    }
+
+
+def generation_config(keys=SECTION_KEYS):
+    """Gemini generation config asking for JSON that matches `response_schema(keys)`."""
+    return {"response_mime_type": "application/json", "response_schema": response_schema(keys)}
+
+
+def load_plan_json(text):
+    """Decodes a JSON answer (tolerating a ```json fence); returns {} if it isn't a JSON object."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _coordinate(value, limit):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value) if -limit <= value <= limit else None
+
+
+def _place(raw):
+    """A location with a name and in-range coordinates, or None."""
+    if not isinstance(raw, dict):
+        return None
+    name = _text(raw.get("name"))
+    lat = _coordinate(raw.get("lat"), 90)
+    lon = _coordinate(raw.get("lon"), 180)
+    if not name or lat is None or lon is None:
+        return None
+    return dict(raw, name=name, lat=lat, lon=lon)
+
+
+def _validate_budget(value):
+    if not isinstance(value, list):
+        return None
+    rows = [
+        {"category": _text(row.get("category")), "amount": _text(row.get("amount")), "notes": _text(row.get("notes"))}
+        for row in value if isinstance(row, dict)
+    ]
+    rows = [row for row in rows if row["category"] and row["amount"]]
+    return rows or None
+
+
+def _validate_itinerary(value, duration):
+    if not isinstance(value, list):
+        return None
+    days = {}
+    for raw in value:
+        if not isinstance(raw, dict) or isinstance(raw.get("day"), bool) or not isinstance(raw.get("day"), int):
+            continue
+        plan = _text(raw.get("plan"))
+        if not plan:
+            continue
+        locations = [place for place in map(_place, raw.get("locations") or []) if place]
+        days.setdefault(raw["day"], {"day": raw["day"], "title": _text(raw.get("title")), "plan": plan, "locations": locations})
+    if not days or (duration and sorted(days) != list(range(1, duration + 1))):
+        return None
+    return [days[number] for number in sorted(days)]
+
+
+def _validate_accommodation(value):
+    if not isinstance(value, list):
+        return None
+    places = [place for place in map(_place, value) if place]
+    for place in places:
+        place["description"] = _text(place.get("description"))
+    return places or None
+
+
+def validate_plan_data(data, duration=None, keys=SECTION_KEYS):
+    """
+    Checks the requested sections of a decoded answer. Returns (valid, bad):
+    `valid` maps section keys to cleaned values and `bad` lists the keys that
+    are missing or malformed. Individual locations with unusable coordinates
+    are dropped rather than failing their section.
+    """
+    valid, bad = {}, []
+    for key in keys:
+        value = data.get(key)
+        if key in ("summary", "transport"):
+            value = _text(value) or None
+        elif key == "budget":
+            value = _validate_budget(value)
+        elif key == "itinerary":
+            value = _validate_itinerary(value, duration)
+        else:
+            value = _validate_accommodation(value)
+        if value is None:
+            bad.append(key)
+        else:
+            valid[key] = value
+    return valid, bad
+
+
+def _markup_name(name):
+    # LOCATION_RX only accepts word characters, spaces, commas, apostrophes and hyphens.
+    name = re.sub(r"[^\w\s,'-]", " ", name.replace("&", " and "))
+    return re.sub(r"\s+", " ", name).strip(" ,'-")
+
+
+def _location_markup(name, day, lat, lon):
+    return f"**{_markup_name(name)}** (day: {day}, lat: {lat:.4f}, lon: {lon:.4f})"
+
+
+def _render_day(day):
+    plan = day["plan"]
+    unplaced = []
+    for place in day["locations"]:
+        bold = f"**{place['name']}**"
+        markup = _location_markup(place["name"], day["day"], place["lat"], place["lon"])
+        if bold in plan:
+            plan = plan.replace(bold, markup, 1)
+        else:
+            unplaced.append(markup)
+    title = f"**Day {day['day']}: {day['title']}**" if day["title"] else f"**Day {day['day']}**"
+    text = f"{title}\n\n{plan}\n"
+    if unplaced:
+        text += "\n" + "\n".join(f"- {markup}" for markup in unplaced) + "\n"
+    return text
+
+
+def render_sections(plan):
+    """Renders validated sections to the Markdown that goes under each tag."""
+    sections = {}
+    if "summary" in plan:
+        sections["summary"] = f"\n{plan['summary']}\n\n"
+    if "budget" in plan:
+        rows = "\n".join(f"| {row['category']} | {row['amount']} | {row['notes']} |" for row in plan["budget"])
+        sections["budget"] = f"\n| Category | Estimated Cost | Notes |\n|---|---|---|\n{rows}\n\n"
+    if "itinerary" in plan:
+        sections["itinerary"] = "\n" + "\n".join(_render_day(day) for day in plan["itinerary"]) + "\n"
+    if "accommodation" in plan:
+        lines = "\n".join(
+            f"- Stay at {_location_markup(place['name'], 1, place['lat'], place['lon'])}"
+            + (f": {place['description']}" if place["description"] else "")
+            for place in plan["accommodation"]
+        )
+        sections["accommodation"] = f"\n{lines}\n\n"
+    if "transport" in plan:
+        sections["transport"] = f"\n{plan['transport']}\n"
+    return sections
+
+
+def render_plan_text(plan):
+    """Renders a validated plan to the tagged text format read by parse_plan_text."""
+    return join_sections(render_sections(plan))
@@ -0,0 +1,139 @@
+"""
+The trip toolkit's Gemini features, usable without Streamlit: packing
+lists, the local guide and re-planned ("rainy day", "low energy") days.
+"""
+from travelbuddy.cache import variant_cache_key
+from travelbuddy.plan_parser import split_days
+from travelbuddy.scheduling import PRIORITY_FOREGROUND
+
+
+def build_itinerary_context(parsed_plan):
+    """Builds the summary + itinerary text used as context for follow-up prompts."""
+    return f"SUMMARY: {parsed_plan['summary']}\nITINERARY: {parsed_plan['itinerary']}"
+
+
+def generate_packing_list(client, itinerary_context, priority=PRIORITY_FOREGROUND):
+    """Generates a packing list based on the itinerary. Raises LLMError on failure."""
+    prompt = f"""
+    Based on the following travel itinerary:
+    ---
+    {itinerary_context}
+    ---
+    Generate a detailed packing list. Group items by category (e.g., Clothing, Toiletries, Electronics, Documents).
+    Be smart about the list; for example, if the plan mentions 'trekking', add hiking shoes. If it mentions 'beach', add swimwear.
+    """
+    return client.generate(prompt, priority=priority)
+
+
+# Known answers for the bundled cities, so the local guide needs a single Gemini call.
+LOCAL_LANGUAGES = {
+    'Mumbai': 'Marathi', 'Delhi': 'Hindi', 'Bengaluru': 'Kannada', 'Chennai': 'Tamil',
+    'Kolkata': 'Bengali', 'Hyderabad': 'Telugu', 'Pune': 'Marathi', 'Ahmedabad': 'Gujarati',
+    'Jaipur': 'Hindi', 'Goa': 'Konkani', 'Kochi': 'Malayalam', 'Varanasi': 'Hindi',
+    'Agra': 'Hindi', 'Rishikesh': 'Hindi', 'Shimla': 'Hindi', 'Darjeeling': 'Nepali',
+    'Udaipur': 'Hindi', 'Amritsar': 'Punjabi',
+}
+
+
+def get_local_language(client, plan_cache, destination, priority=PRIORITY_FOREGROUND):
+    """Returns the primary local language of a destination; Gemini is asked at most once per destination."""
+    if destination in LOCAL_LANGUAGES:
+        return LOCAL_LANGUAGES[destination]
+    cache_key = f"local_language:{destination.strip().lower()}"
+    local_language = plan_cache.get(cache_key)
+    if local_language is None:
+        local_language_prompt = f"What is the primary local language spoken in {destination}? Just answer with the name of the language (e.g., 'Hindi', 'Marathi', 'Bengali')."
+        local_language = client.generate(local_language_prompt, priority=priority).strip()
+        plan_cache.set(cache_key, local_language, ttl=float("inf"))
+    return local_language
+
+
+def generate_local_guide(client, plan_cache, destination, language, priority=PRIORITY_FOREGROUND):
+    """Generates a local guide for the destination. Raises LLMError on failure."""
+    local_language = get_local_language(client, plan_cache, destination, priority)
+
+    prompt = f"""
+    You are a friendly local guide for a tourist visiting {destination}.
+    Generate a concise 'Know Before You Go' guide. The response must be in {language}.
+    Include these sections, formatted with Markdown:
+
+    1.  **Must-Try Local Foods:** (List 3-5 specific dishes, not restaurants).
+    2.  **Cultural Etiquette:** (e.g., tipping, greetings, dress code for temples).
+    3.  **Common Scams to Watch Out For:** (Briefly describe 2-3 common local scams).
+    4.  **Basic Phrases in {local_language}:** (Provide 5-7 basic phrases like 'Hello', 'Thank You' in {local_language} with phonetic pronunciation for an {language} speaker).
+    """
+    return client.generate(prompt, priority=priority)
+
+
+def build_reason_prompt(reason, destination):
+    """Describes why the user wants a day re-planned."""
+    if reason == "rainy":
+        return f"It is now raining. Please generate a new, 'rainy day' version of this plan for {destination}. Focus on high-quality indoor activities (like museums, cafes, indoor markets, or cultural centers) that are logically close to the original locations."
+    if reason == "low_energy":
+        return f"The user is feeling tired and wants a low-energy, more relaxed version of this plan for {destination}. Please generate a new plan that replaces high-energy activities with restful ones (like a relaxed walk in a park, a scenic cafe, a spa, or a shorter sightseeing trip)."
+    return ""
+
+
+def generate_modified_plan(client, plan_cache, day_content, reason, destination, language, priority=PRIORITY_FOREGROUND):
+    """Generates a modified plan for a specific day, reusing a cached variant when there is one. Raises LLMError on failure."""
+    cache_key = variant_cache_key(day_content, reason, language)
+    cached_variant = plan_cache.get(cache_key)
+    if cached_variant is not None:
+        return cached_variant
+
+    reason_prompt = build_reason_prompt(reason, destination)
+    prompt = f"""
+    You are a dynamic travel planner. The user's original plan is:
+    ---
+    {day_content}
+    ---
+
+    The user's situation has changed: {reason_prompt}
+
+    Generate a new, modified plan for this day. Respond in {language}.
+    Ensure you keep the same Markdown formatting, including the bolded day title (e.g., **Day X...**) and any location formatting (like **Name of Place** (day: X, ...)).
+    """
+    modified_plan = client.generate(prompt, priority=priority)
+    plan_cache.set(cache_key, modified_plan)
+    return modified_plan
+
+
+def generate_modified_days(client, plan_cache, days, reason, destination, language, priority=PRIORITY_FOREGROUND):
+    """
+    Re-plans several days ({day number: original content}) with one Gemini request and returns {day number: new content}.
+    Cached variants are reused, and any day missing from the batched answer falls back to a single-day request.
+    Raises LLMError on failure.
+    """
+    modified = {}
+    remaining = {}
+    for day_num, day_content in days.items():
+        cached_variant = plan_cache.get(variant_cache_key(day_content, reason, language))
+        if cached_variant is not None:
+            modified[day_num] = cached_variant
+        else:
+            remaining[day_num] = day_content
+
+    if len(remaining) > 1:
+        reason_prompt = build_reason_prompt(reason, destination)
+        original_days = "\n\n".join(remaining[day_num].strip() for day_num in sorted(remaining))
+        prompt = f"""
+    You are a dynamic travel planner. The user's original plan for these days is:
+    ---
+    {original_days}
+    ---
+
+    The user's situation has changed: {reason_prompt}
+
+    Generate a new, modified plan for EACH of these days ({', '.join(f'Day {d}' for d in sorted(remaining))}). Respond in {language}.
+    Start every day with its bolded day title using the English word "Day" (e.g., **Day X...**), keep the days in order,
+    and keep any location formatting (like **Name of Place** (day: X, ...)).
+    """
+        batch_days = split_days(client.generate(prompt, priority=priority))
+        for day_num in list(remaining):
+            if day_num in batch_days:
+                modified[day_num] = batch_days[day_num]
+                plan_cache.set(variant_cache_key(remaining.pop(day_num), reason, language), modified[day_num])
+
+    for day_num, day_content in remaining.items():
+        modified[day_num] = generate_modified_plan(client, plan_cache, day_content, reason, destination, language, priority)
+    return modified
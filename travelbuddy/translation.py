@@ -0,0 +1,154 @@
+"""
+Translates a finished plan into another language instead of generating a
+new one. Each section, and each day of the itinerary, is translated
+separately and in parallel, and cached per (plan, part, language).
+Re-planned days are translated the same way (translate_days).
+
+Location markup (`**Name** (day: X, lat: .., lon: ..)`) and `**Day N`
+headers are swapped for numbered placeholders before translation and put
+back afterwards, so maps, routes and day tabs work unchanged on the
+translated plan. Place names therefore stay as written in the original.
+"""
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from travelbuddy.cache import canonical_language
+from travelbuddy.metrics import METRICS, log_event
+from travelbuddy.plan_parser import DAY_HEADER_RX, LOCATION_RX, PLAN_SECTIONS, ParsedPlan
+from travelbuddy.scheduling import PRIORITY_FOREGROUND
+
+DEFAULT_TRANSLATION_WORKERS = 4
+
+_PROTECTED_RX = re.compile(f"{LOCATION_RX.pattern}|{DAY_HEADER_RX.pattern}", re.IGNORECASE)
+_PLACEHOLDER_RX = re.compile(r"⟦(\d+)⟧")
+
+
+def translation_cache_key(plan_digest, part, language):
+    return f"translation:{plan_digest}:{part}:{canonical_language(language)}"
+
+
+def protect_markup(text):
+    """Replaces location markup and day headers with ⟦n⟧ placeholders; returns (text, originals)."""
+    originals = []
+
+    def hold(match):
+        originals.append(match.group(0))
+        return f"⟦{len(originals) - 1}⟧"
+
+    return _PROTECTED_RX.sub(hold, text), originals
+
+
+def restore_markup(text, originals):
+    """Puts the originals back; returns None unless every placeholder comes back exactly once."""
+    found = [int(n) for n in _PLACEHOLDER_RX.findall(text)]
+    if sorted(found) != list(range(len(originals))):
+        return None
+    return _PLACEHOLDER_RX.sub(lambda match: originals[int(match.group(1))], text)
+
+
+def build_translation_prompt(text, language):
+    return f"""
+    Translate the following part of a travel itinerary into {language}.
+    Keep the Markdown formatting (tables, lists, bold text) exactly as it is.
+    Copy every placeholder like ⟦0⟧ unchanged, exactly once, in the place it belongs in the translated sentence.
+    Respond with the translation only.
+    ---
+    {text}
+    """
+
+
+def _split_itinerary(itinerary):
+    """Splits the itinerary into [(part name, text)]: any intro, then one part per `**Day N` block."""
+    headers = list(DAY_HEADER_RX.finditer(itinerary))
+    if not headers:
+        return [("itinerary", itinerary)]
+    parts = [("itinerary-intro", itinerary[:headers[0].start()])]
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(itinerary)
+        parts.append((f"itinerary-{i}", itinerary[match.start():end]))
+    return parts
+
+
+def translate_text(client, text, language, priority=PRIORITY_FOREGROUND):
+    """Translates one piece of a plan with its markup protected; returns None if the markup didn't survive."""
+    body = text.strip()
+    if not body:
+        return text
+    masked, originals = protect_markup(body)
+    translated = restore_markup(client.generate(build_translation_prompt(masked, language), priority=priority).strip(),
+                                originals)
+    if translated is None:
+        return None
+    # Keep the original's surrounding whitespace, which separates days and sections.
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()):]
+    return f"{leading}{translated}{trailing}"
+
+
+def _translate_cached(client, plan_cache, cache_key, text, language, priority, source, part):
+    """translate_text through the plan cache; a part whose markup was damaged comes back untranslated."""
+    cached = plan_cache.get(cache_key) if plan_cache is not None else None
+    if cached is not None:
+        return cached
+    translated = translate_text(client, text, language, priority)
+    if translated is None:
+        METRICS.inc("travelbuddy_translation_fallbacks_total")
+        log_event("translation_fallback", plan=source, part=part, language=language)
+        return text
+    if plan_cache is not None:
+        plan_cache.set(cache_key, translated)
+    return translated
+
+
+def _run_parts(jobs, executor):
+    """Runs (key, fn, args) jobs on `executor` (a private pool if None); returns [(key, result)] in order."""
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=DEFAULT_TRANSLATION_WORKERS, thread_name_prefix="translate")
+    try:
+        futures = [(key, executor.submit(fn, *args)) for key, fn, args in jobs]
+        return [(key, future.result()) for key, future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def translate_plan(client, plan_cache, parsed_plan, language, executor=None, priority=PRIORITY_FOREGROUND):
+    """
+    Returns `parsed_plan` translated into `language` as a new ParsedPlan.
+
+    Parts are translated concurrently on `executor` (a private pool is used
+    if None) and cached in `plan_cache` (may be None). A part whose markup
+    the model damaged is kept in the original language rather than losing
+    its locations. Raises LLMError if Gemini fails.
+    """
+    parts = []
+    for _, key in PLAN_SECTIONS:
+        if key == "itinerary":
+            parts.extend((name, key, text) for name, text in _split_itinerary(parsed_plan[key]))
+        else:
+            parts.append((key, key, parsed_plan[key]))
+
+    jobs = [
+        (key, _translate_cached, (client, plan_cache, translation_cache_key(parsed_plan.digest, name, language), text,
+                                  language, priority, parsed_plan.digest, name))
+        for name, key, text in parts
+    ]
+    sections = {}
+    for key, translated in _run_parts(jobs, executor):
+        sections[key] = sections.get(key, "") + translated
+    return ParsedPlan.from_sections(sections)
+
+
+def translate_days(client, plan_cache, days, language, executor=None, priority=PRIORITY_FOREGROUND):
+    """
+    Translates re-planned days ({day: content}) the same way as translate_plan;
+    returns {day: translated content}. Each day is cached by its own text.
+    """
+    jobs = []
+    for day, content in days.items():
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        jobs.append((day, _translate_cached, (client, plan_cache, translation_cache_key(digest, "day", language),
+                                              content, language, priority, digest, f"modified-day-{day}")))
+    return dict(_run_parts(jobs, executor))
@@ -0,0 +1,73 @@
+"""Compact pydeck specs for the trip map."""
+import numpy as np
+import pydeck as pdk
+
+from travelbuddy.assets import DEFAULT_MAP_STYLE
+
+MARKER_ICON = "marker"
+# Five decimals is about a metre; more only inflates the JSON.
+COORD_DECIMALS = 5
+ROUTE_COLORS = [[230, 57, 70], [29, 53, 87], [42, 157, 143], [244, 162, 97], [131, 56, 236], [255, 183, 3]]
+TOOLTIP = {"html": "<b>{name}</b>", "style": {"color": "black", "background-color": "white"}}
+
+
+class CachedDeck(pdk.Deck):
+    """A Deck that serialises itself once. Only use it for decks that are never mutated."""
+
+    def to_json(self):
+        cached = self.__dict__.get("_cached_json")
+        if cached is None:
+            cached = super().to_json()
+            self.__dict__["_cached_json"] = cached
+        return cached
+
+
+def _positions(lat, lon):
+    coords = np.column_stack([np.asarray(lon, dtype=np.float32), np.asarray(lat, dtype=np.float32)])
+    return np.round(coords.astype(np.float64), COORD_DECIMALS).tolist()
+
+
+def map_points(locations):
+    """One small record per location: name, day, [lon, lat] and the icon key into the shared atlas."""
+    positions = _positions(locations["lat"].to_numpy(), locations["lon"].to_numpy())
+    return [
+        {"name": name, "day": int(day), "position": position, "icon": MARKER_ICON}
+        for name, day, position in zip(locations["name"], locations["day"], positions)
+    ]
+
+
+def route_paths(day_routes):
+    """One path record per day with at least two stops, from {day: (ordered locations, total km)}."""
+    return [
+        {
+            "name": f"Day {day} route · {total_km:.1f} km",
+            "path": _positions(ordered["lat"].to_numpy(), ordered["lon"].to_numpy()),
+            "color": ROUTE_COLORS[(day - 1) % len(ROUTE_COLORS)],
+        }
+        for day, (ordered, total_km) in day_routes.items() if len(ordered) > 1
+    ]
+
+
+def build_deck(points, paths, latitude, longitude, icon_atlas, icon_size=128, zoom=11, map_style=DEFAULT_MAP_STYLE):
+    """
+    Builds the map for a set of points and route paths.
+
+    Every marker references the same entry in `icon_atlas`, so the icon
+    definition is sent once per layer instead of once per point. Pass
+    `map_style=None` to draw without a basemap.
+    """
+    icon_mapping = {MARKER_ICON: {"x": 0, "y": 0, "width": icon_size, "height": icon_size, "anchorY": icon_size}}
+    return CachedDeck(
+        map_style=map_style,
+        map_provider="carto" if map_style else None,
+        initial_view_state=pdk.ViewState(latitude=latitude, longitude=longitude, zoom=zoom, pitch=50),
+        layers=[
+            pdk.Layer("PathLayer", data=paths, get_path="path", get_color="color",
+                      width_min_pixels=3, pickable=True),
+            pdk.Layer("IconLayer", data=points, get_icon="icon", get_position="position",
+                      # Quoted so pydeck passes the URL through instead of inlining a local file as base64.
+                      icon_atlas=f"'{icon_atlas}'", icon_mapping=icon_mapping,
+                      get_size=4, size_scale=15, pickable=True),
+        ],
+        tooltip=TOOLTIP,
+    )
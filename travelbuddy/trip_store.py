@@ -0,0 +1,273 @@
+"""SQLite store for saved trips: plans, re-planned days, expenses, journal notes and photo references."""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from travelbuddy.plan_parser import PLAN_SECTIONS, ParsedPlan
+
+TRIP_META_FIELDS = ("origin", "destination", "start_date", "end_date", "travelers", "language")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS trips ("
+    " id TEXT PRIMARY KEY,"
+    " owner TEXT,"
+    " title TEXT NOT NULL,"
+    " origin TEXT, destination TEXT, start_date TEXT, end_date TEXT,"
+    " travelers INTEGER, language TEXT,"
+    " plan_digest TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS trip_sections ("
+    " trip_id TEXT NOT NULL REFERENCES trips (id) ON DELETE CASCADE,"
+    " section TEXT NOT NULL,"
+    " content TEXT NOT NULL,"
+    " PRIMARY KEY (trip_id, section))",
+    "CREATE TABLE IF NOT EXISTS trip_days ("
+    " trip_id TEXT NOT NULL REFERENCES trips (id) ON DELETE CASCADE,"
+    " day INTEGER NOT NULL,"
+    " content TEXT NOT NULL,"
+    " modified_content TEXT,"
+    " PRIMARY KEY (trip_id, day))",
+    "CREATE TABLE IF NOT EXISTS expenses ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " trip_id TEXT NOT NULL REFERENCES trips (id) ON DELETE CASCADE,"
+    " item TEXT NOT NULL,"
+    " amount REAL NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " payer INTEGER NOT NULL DEFAULT 0,"
+    " category TEXT NOT NULL DEFAULT 'Other',"
+    " day INTEGER,"
+    " participants INTEGER)",
+    "CREATE INDEX IF NOT EXISTS expenses_trip ON expenses (trip_id, id)",
+    "CREATE TABLE IF NOT EXISTS journals ("
+    " trip_id TEXT NOT NULL REFERENCES trips (id) ON DELETE CASCADE,"
+    " day INTEGER NOT NULL,"
+    " notes TEXT NOT NULL,"
+    " updated_at REAL NOT NULL,"
+    " PRIMARY KEY (trip_id, day))",
+    "CREATE TABLE IF NOT EXISTS journal_photos ("
+    " trip_id TEXT NOT NULL REFERENCES trips (id) ON DELETE CASCADE,"
+    " day INTEGER NOT NULL,"
+    " digest TEXT NOT NULL,"
+    " name TEXT NOT NULL,"
+    " added_at REAL NOT NULL,"
+    " PRIMARY KEY (trip_id, day, digest))",
+)
+
+
+# Columns added after the first release, for databases created before them.
+_ADDED_COLUMNS = {
+    "trips": (
+        ("owner", "TEXT"),
+    ),
+    "expenses": (
+        ("payer", "INTEGER NOT NULL DEFAULT 0"),
+        ("category", "TEXT NOT NULL DEFAULT 'Other'"),
+        ("day", "INTEGER"),
+        ("participants", "INTEGER"),
+    ),
+}
+
+# Indexes on added columns, created once the columns exist.
+_INDEXES = (
+    "DROP INDEX IF EXISTS trips_updated_at",
+    "CREATE INDEX IF NOT EXISTS trips_owner ON trips (owner, updated_at)",
+)
+
+
+class TripStore:
+    """
+    Saved trips in one SQLite database (WAL mode, so readers never block the writer).
+
+    A trip's five sections and its days are separate rows: `list_trips`
+    reads only the trips table, and `load_section` reads a single section.
+    All methods are safe to call from several sessions at once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for name, definition in columns:
+                    if name not in existing:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            for statement in _INDEXES:
+                self._conn.execute(statement)
+
+    def _write(self, statements):
+        with self._lock, self._conn:
+            for sql, params in statements:
+                self._conn.execute(sql, params)
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # --- Trips ---
+    def save_trip(self, parsed_plan, owner=None, **meta):
+        """
+        Saves a plan with its trip details (see TRIP_META_FIELDS) as a new
+        trip of `owner` and returns its id. Every save is a trip of its own,
+        even when another trip has the same plan (a cached or catalog plan).
+        """
+        trip_id = uuid.uuid4().hex
+        now = time.time()
+        values = [meta.get(field) for field in TRIP_META_FIELDS]
+        title = f"{meta.get('origin') or '?'} → {meta.get('destination') or '?'} ({meta.get('start_date') or 'undated'})"
+        statements = [(
+            "INSERT INTO trips (id, owner, title, origin, destination, start_date, end_date, travelers, language,"
+            " plan_digest, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (trip_id, owner, title, *values, parsed_plan.digest, now, now),
+        )]
+        statements += [
+            ("INSERT INTO trip_sections (trip_id, section, content) VALUES (?, ?, ?)", (trip_id, key, parsed_plan[key]))
+            for _, key in PLAN_SECTIONS
+        ]
+        statements += [
+            ("INSERT INTO trip_days (trip_id, day, content) VALUES (?, ?, ?)", (trip_id, day, content))
+            for day, content in parsed_plan.days.items()
+        ]
+        self._write(statements)
+        return trip_id
+
+    def update_plan(self, trip_id, parsed_plan, **meta):
+        """
+        Replaces a saved trip's plan text (e.g. with a translation) and any
+        given trip details, keeping its id and everything saved under it.
+        """
+        fields = [field for field in TRIP_META_FIELDS if field in meta]
+        assignments = "".join(f", {field} = ?" for field in fields)
+        statements = [(
+            f"UPDATE trips SET plan_digest = ?, updated_at = ?{assignments} WHERE id = ?",
+            (parsed_plan.digest, time.time(), *[meta[field] for field in fields], trip_id),
+        )]
+        statements += [
+            ("INSERT INTO trip_sections (trip_id, section, content) VALUES (?, ?, ?)"
+             " ON CONFLICT (trip_id, section) DO UPDATE SET content = excluded.content",
+             (trip_id, key, parsed_plan[key]))
+            for _, key in PLAN_SECTIONS
+        ]
+        statements += [
+            ("INSERT INTO trip_days (trip_id, day, content) VALUES (?, ?, ?)"
+             " ON CONFLICT (trip_id, day) DO UPDATE SET content = excluded.content", (trip_id, day, content))
+            for day, content in parsed_plan.days.items()
+        ]
+        self._write(statements)
+
+    def list_trips(self, owner, limit=50):
+        """`owner`'s most recently used trips first, as dicts of the trips-table columns (no plan text)."""
+        rows = self._read(
+            "SELECT id, title, " + ", ".join(TRIP_META_FIELDS) + ", updated_at"
+            " FROM trips WHERE owner = ? ORDER BY updated_at DESC LIMIT ?",
+            (owner, limit),
+        )
+        columns = ("id", "title") + TRIP_META_FIELDS + ("updated_at",)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_trip(self, trip_id):
+        """One trip's details, or None."""
+        for trip in self._read(
+            "SELECT id, title, " + ", ".join(TRIP_META_FIELDS) + ", updated_at FROM trips WHERE id = ?", (trip_id,)
+        ):
+            return dict(zip(("id", "title") + TRIP_META_FIELDS + ("updated_at",), trip))
+        return None
+
+    def touch(self, trip_id):
+        """Marks a trip as just used so it sorts first."""
+        self._write([("UPDATE trips SET updated_at = ? WHERE id = ?", (time.time(), trip_id))])
+
+    def delete_trip(self, trip_id):
+        self._write([("DELETE FROM trips WHERE id = ?", (trip_id,))])
+
+    def load_section(self, trip_id, section):
+        """The text of one section, or None."""
+        rows = self._read("SELECT content FROM trip_sections WHERE trip_id = ? AND section = ?", (trip_id, section))
+        return rows[0][0] if rows else None
+
+    def load_plan(self, trip_id):
+        """Rebuilds the saved ParsedPlan, or returns None if the trip is unknown or incomplete."""
+        sections = dict(self._read("SELECT section, content FROM trip_sections WHERE trip_id = ?", (trip_id,)))
+        if len(sections) < len(PLAN_SECTIONS):
+            return None
+        return ParsedPlan.from_sections(sections)
+
+    # --- Re-planned days ---
+    def save_modified_days(self, trip_id, modified_days):
+        """Stores re-planned day texts ({day: content}) next to the original days."""
+        self._write([
+            ("UPDATE trip_days SET modified_content = ? WHERE trip_id = ? AND day = ?", (content, trip_id, day))
+            for day, content in modified_days.items()
+        ])
+
+    def load_modified_days(self, trip_id):
+        return dict(self._read(
+            "SELECT day, modified_content FROM trip_days WHERE trip_id = ? AND modified_content IS NOT NULL",
+            (trip_id,),
+        ))
+
+    # --- Expenses ---
+    def add_expense(self, trip_id, item, amount, payer=0, category="Other", day=None, participants=None):
+        """`participants` is a bitmask of the travelers sharing the expense; None means everyone."""
+        self._write([(
+            "INSERT INTO expenses (trip_id, item, amount, created_at, payer, category, day, participants)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (trip_id, item, float(amount), time.time(), payer, category, day, participants),
+        )])
+
+    def load_expenses(self, trip_id):
+        """Expenses in the order they were added, as dicts with the add_expense fields."""
+        rows = self._read(
+            "SELECT item, amount, payer, category, day, participants FROM expenses WHERE trip_id = ? ORDER BY id",
+            (trip_id,),
+        )
+        return [
+            {"item": item, "amount": amount, "payer": payer, "category": category, "day": day,
+             "participants": participants}
+            for item, amount, payer, category, day, participants in rows
+        ]
+
+    def clear_expenses(self, trip_id):
+        self._write([("DELETE FROM expenses WHERE trip_id = ?", (trip_id,))])
+
+    # --- Journals ---
+    def save_journal(self, trip_id, day, notes):
+        self._write([(
+            "INSERT INTO journals (trip_id, day, notes, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (trip_id, day) DO UPDATE SET notes = excluded.notes, updated_at = excluded.updated_at",
+            (trip_id, day, notes, time.time()),
+        )])
+
+    def load_journals(self, trip_id):
+        """{day: notes} for one trip."""
+        return dict(self._read("SELECT day, notes FROM journals WHERE trip_id = ?", (trip_id,)))
+
+    def add_photos(self, trip_id, day, photos):
+        """Records photos (dicts with 'digest' and 'name') for a day; the files live in the PhotoStore."""
+        now = time.time()
+        self._write([
+            ("INSERT OR IGNORE INTO journal_photos (trip_id, day, digest, name, added_at) VALUES (?, ?, ?, ?, ?)",
+             (trip_id, day, photo["digest"], photo["name"], now))
+            for photo in photos
+        ])
+
+    def load_photos(self, trip_id):
+        """{day: [{'digest', 'name'}, ...]} in upload order."""
+        photos = {}
+        for day, digest, name in self._read(
+            "SELECT day, digest, name FROM journal_photos WHERE trip_id = ? ORDER BY added_at, rowid", (trip_id,)
+        ):
+            photos.setdefault(day, []).append({"digest": digest, "name": name})
+        return photos
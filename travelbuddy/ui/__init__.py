@@ -0,0 +1,7 @@
+"""
+The Streamlit app's subsystems, split out of app.py. app.py lays out the
+page and imports each of these when its feature first appears (the map and
+journal once there is a plan, the PDF module on download), so a cold start
+only loads what the first page needs. Settings come from the environment
+(and .env) in travelbuddy.ui.settings.
+"""
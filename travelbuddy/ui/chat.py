@@ -0,0 +1,81 @@
+"""The sidebar chatbot: a budgeted conversation about the current plan, with shared cached answers."""
+import streamlit as st
+
+from travelbuddy.chat_context import ChatContext, build_system_instruction
+from travelbuddy.llm import LLMError, response_text
+from travelbuddy.scheduling import PRIORITY_INTERACTIVE
+from travelbuddy.ui.resources import get_answer_cache, get_llm_client
+from travelbuddy.ui.settings import CHAT_TOKEN_BUDGET, LLM_AVAILABLE
+
+
+def new_chat_context(itinerary_context=None):
+    """Starts a chatbot conversation with the itinerary installed as system context."""
+    return ChatContext(build_system_instruction(itinerary_context), token_budget=CHAT_TOKEN_BUDGET)
+
+
+def ask_chatbot(chat_context, prompt):
+    """
+    Answers a chat question within the context's token budget. General questions
+    about the destination that were answered before are answered from the cache.
+    Returns (answer, from_cache). Raises LLMError on failure.
+    """
+    trip = st.session_state.trip or {}
+    destination, language = trip.get("destination") or "", trip.get("language")
+    # Without a destination there is nothing to tell apart answers about different places.
+    answer_cache = get_answer_cache() if destination.strip() else None
+    cached = answer_cache.lookup(destination, language, prompt) if answer_cache else None
+    if cached:
+        chat_context.record(prompt, cached[0])
+        return cached[0], True
+    contents = chat_context.build_contents(prompt)
+    response = get_llm_client().generate_response(
+        contents, system_instruction=chat_context.system_instruction, priority=PRIORITY_INTERACTIVE
+    )
+    answer = response_text(response)
+    chat_context.record(prompt, answer, getattr(response, "usage_metadata", None))
+    if answer_cache:
+        answer_cache.add(destination, language, prompt, answer)
+    return answer, False
+
+
+@st.fragment
+def chatbot():
+    """The sidebar chatbot; reads and updates st.session_state.messages and chat_context."""
+    st.header("🤖 Ask Anything")
+
+    if not LLM_AVAILABLE or st.session_state.chat_context is None:
+        st.warning("Please add your Google API Key in the `.env` file to use the chatbot.")
+        return
+
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("cached"):
+                st.caption("⚡ Answered from a similar earlier question")
+            elif message.get("tokens"):
+                st.caption(f"🔢 ~{message['tokens']} prompt tokens")
+
+    if prompt := st.chat_input("Ask about your plan..."):
+        st.session_state.messages.append({"role": "user", "content": prompt})
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # The itinerary is already the system instruction; only the question and a budgeted history are sent.
+        chat_context = st.session_state.chat_context
+        with st.chat_message("assistant"):
+            with st.spinner("Thinking..."):
+                prompt_tokens, from_cache = None, False
+                try:
+                    answer, from_cache = ask_chatbot(chat_context, prompt)
+                    if not from_cache:
+                        prompt_tokens = chat_context.last_prompt_tokens
+                except LLMError as e:
+                    answer = f"An error occurred: {e}"
+                st.markdown(answer)
+                if from_cache:
+                    st.caption("⚡ Answered from a similar earlier question")
+                elif prompt_tokens:
+                    st.caption(f"🔢 ~{prompt_tokens} prompt tokens")
+        st.session_state.messages.append(
+            {"role": "assistant", "content": answer, "tokens": prompt_tokens, "cached": from_cache}
+        )
@@ -0,0 +1,91 @@
+"""The sidebar expense tracker, backed by the session's ExpenseLedger and the trip store."""
+import streamlit as st
+
+from travelbuddy.ledger import EXPENSE_CATEGORIES
+from travelbuddy.ui.resources import get_trip_store
+from travelbuddy.ui.session import current_trip_id
+from travelbuddy.ui.settings import EXPENSE_PAGE_SIZE
+
+
+def traveler_names(travelers):
+    return [f"Traveler {i + 1}" for i in range(travelers)]
+
+
+def set_expense_page(page):
+    st.session_state.expense_page = page
+
+
+def clear_expenses():
+    st.session_state.expenses.clear()
+    st.session_state.expense_page = 0
+    store = get_trip_store()
+    if store and current_trip_id():
+        store.clear_expenses(current_trip_id())
+
+
+# Reruns on its own, so adding an expense doesn't re-render the plan, the map or the PDF button.
+@st.fragment
+def expense_tracker(travelers):
+    """The sidebar expense tracker; totals come from the ledger's running aggregates, and rows are paginated."""
+    st.header("💸 Expense Tracker")
+    ledger = st.session_state.expenses
+    ledger.resize(travelers)
+    names = traveler_names(ledger.travelers)
+    parsed_plan = st.session_state.get("parsed_plan")
+    days = parsed_plan.day_numbers if parsed_plan else []
+
+    with st.form(key="expense_form", clear_on_submit=True):
+        item = st.text_input("Expense Item (e.g., Cab, Food):")
+        amount = st.number_input("Amount (₹):", min_value=0.0, format="%.2f", step=10.0)
+        col1, col2 = st.columns(2)
+        payer = col1.selectbox("Paid by:", range(len(names)), format_func=names.__getitem__)
+        category = col2.selectbox("Category:", EXPENSE_CATEGORIES)
+        day = st.selectbox("Day:", [None] + days, format_func=lambda d: "Whole trip" if d is None else f"Day {d}")
+        shared_by = st.multiselect("Shared by:", range(len(names)), default=list(range(len(names))),
+                                   format_func=names.__getitem__)
+        submitted = st.form_submit_button("Add Expense", use_container_width=True)
+
+    if submitted and item and amount > 0 and shared_by:
+        participants = sum(1 << i for i in shared_by)
+        ledger.add(item, amount, payer, category, day, participants)
+        st.session_state.expense_page = 0
+        store = get_trip_store()
+        if store and current_trip_id():
+            store.add_expense(current_trip_id(), item, amount, payer, category, day, participants)
+
+    if len(ledger):
+        st.subheader(f"Total Expense: ₹{ledger.total / 100:.2f}")
+
+        with st.expander("📊 Breakdown"):
+            lines = [f"- {category}: ₹{paise / 100:.2f}" for category, paise in
+                     sorted(ledger.by_category.items(), key=lambda kv: -kv[1])]
+            lines += [f"- Day {day_num}: ₹{paise / 100:.2f}" for day_num, paise in sorted(ledger.by_day.items())]
+            st.markdown("\n".join(lines))
+
+        if st.button("Settle Up", use_container_width=True):
+            transfers = ledger.settle_up()
+            if transfers:
+                st.info("\n".join(f"- {names[payer]} pays {names[payee]} ₹{paise / 100:.2f}"
+                                   for payer, payee, paise in transfers))
+            else:
+                st.info("Everyone is square.")
+
+        st.markdown("**Expense Details:**")
+        pages = ledger.page_count(EXPENSE_PAGE_SIZE)
+        page = min(st.session_state.expense_page, pages - 1)
+        # One markdown element per page instead of one element per expense.
+        st.markdown("\n".join(
+            f"- {exp['item']}: ₹{exp['amount']:.2f} · {exp['category']} · {names[exp['payer']]} paid"
+            + (f" · Day {exp['day']}" if exp["day"] else "")
+            for _, exp in ledger.page(page, EXPENSE_PAGE_SIZE)
+        ))
+        if pages > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            col1.button("◀", key="expense_prev", disabled=page == 0, on_click=set_expense_page, args=(page - 1,))
+            col2.caption(f"Page {page + 1} of {pages}")
+            col3.button("▶", key="expense_next", disabled=page >= pages - 1, on_click=set_expense_page, args=(page + 1,))
+
+        # A callback runs before the fragment reruns, so the cleared list shows without another rerun.
+        st.button("Clear All Expenses", use_container_width=True, on_click=clear_expenses)
+    else:
+        st.write("No expenses added yet.")
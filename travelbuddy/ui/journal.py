@@ -0,0 +1,112 @@
+"""The day-by-day plan with each day's journal: notes and photos, saved to the trip as they change."""
+import os
+
+import streamlit as st
+
+from travelbuddy.planner import extract_locations
+from travelbuddy.routing import order_day_route
+from travelbuddy.ui.resources import get_photo_store, get_trip_store
+from travelbuddy.ui.session import current_trip_id
+
+
+def save_journal_notes(day_num):
+    """on_change callback for a day's notes."""
+    store = get_trip_store()
+    if store and current_trip_id():
+        store.save_journal(current_trip_id(), day_num, st.session_state.get(f"journal_notes_day_{day_num}", ""))
+
+
+def photo_uploader_key(day_num):
+    return f"journal_photos_day_{day_num}_{st.session_state.photo_uploader_rev.get(day_num, 0)}"
+
+
+def ingest_photos(day_num):
+    """
+    on_change for a day's uploader. Moves the uploads into the photo store,
+    then switches to a fresh uploader key so Streamlit drops the in-memory files.
+    Thumbnails are made in the background; the journal shows them once ready.
+    """
+    store = get_photo_store()
+    photos = st.session_state.journal_photos.setdefault(day_num, [])
+    known = {photo["digest"] for photo in photos}
+    added = []
+    for upload in st.session_state.get(photo_uploader_key(day_num)) or []:
+        digest = store.put(upload)
+        if digest not in known:
+            known.add(digest)
+            added.append({"digest": digest, "name": upload.name})
+    photos.extend(added)
+    trip_store = get_trip_store()
+    if added and trip_store and current_trip_id():
+        trip_store.add_photos(current_trip_id(), day_num, added)
+    st.session_state.photo_uploader_rev[day_num] = st.session_state.photo_uploader_rev.get(day_num, 0) + 1
+
+
+def display_day_plan(day_content, day_num, is_modified=False, route=None):
+    """Displays the itinerary for a single day. Pass `route` (from day_route) to reuse an already-parsed table."""
+    day_title = f"Day {day_num}"
+    if is_modified:
+        day_title += " 🔄 (Modified)"
+
+    with st.expander(day_title, expanded=True):
+        st.markdown(day_content.strip())
+
+        # Extract locations from the *current* content, not the original plan's list
+        current_locations, route_km = order_day_route(extract_locations(day_content)) if route is None else route
+
+        if not current_locations.empty:
+            st.markdown("**Locations for this Day** (suggested order):")
+            for loc in current_locations.itertuples():
+                leg = f" · {loc.leg_km:.1f} km from the last stop" if loc.stop > 1 else ""
+                st.write(f"{loc.stop}. 📍 {loc.name}{leg}")
+            if len(current_locations) > 1:
+                st.caption(f"🗺️ About {route_km:.1f} km between stops in a straight line.")
+
+        st.markdown("---")
+        day_journal(day_num)
+
+
+@st.fragment
+def day_journal(day_num):
+    """Notes and photos for one day. Editing them only reruns this fragment."""
+    st.subheader("My Journal for this Day")
+    st.text_area(
+        "My Notes:",
+        key=f"journal_notes_day_{day_num}",
+        help="Your notes are saved as you type.",
+        on_change=save_journal_notes,
+        args=(day_num,)
+    )
+    st.file_uploader(
+        "Upload Photos:",
+        key=photo_uploader_key(day_num),
+        type=["jpg", "png", "jpeg"],
+        accept_multiple_files=True,
+        on_change=ingest_photos,
+        args=(day_num,)
+    )
+
+    # Only thumbnails are sent to the browser; an original is read from disk when picked below.
+    photos = st.session_state.journal_photos.get(day_num, [])
+    if photos:
+        photo_store = get_photo_store()
+        thumbnails = [(photo, photo_store.thumbnail(photo["digest"])) for photo in photos]
+        ready = [(photo, path) for photo, path in thumbnails if path]
+        broken = [photo for photo, path in thumbnails if not path and photo_store.thumbnail_failed(photo["digest"])]
+        if ready:
+            st.image([path for _, path in ready], caption=[photo["name"] for photo, _ in ready], width=120)
+        if broken:
+            st.caption(f"Couldn't make a preview of: {', '.join(photo['name'] for photo in broken)}")
+        if len(ready) + len(broken) < len(photos):
+            st.caption(f"Preparing {len(photos) - len(ready) - len(broken)} thumbnail(s)…")
+            st.button("Refresh photos", key=f"refresh_photos_day_{day_num}")
+        photo_names = {photo["digest"]: photo["name"] for photo in photos}
+        full_size = st.selectbox(
+            "View full size:", [None] + list(photo_names), key=f"full_photo_day_{day_num}",
+            format_func=lambda digest: "—" if digest is None else photo_names[digest]
+        )
+        # The original can be gone (a cleared photo directory, or a trip saved on another host).
+        if full_size and os.path.exists(photo_store.original_path(full_size)):
+            st.image(photo_store.original_path(full_size), caption=photo_names[full_size])
+        elif full_size:
+            st.caption(f"The original of {photo_names[full_size]} is no longer available.")
@@ -0,0 +1,76 @@
+"""
+The trip map: plan locations checked against the gazetteer, ordered into
+day routes, and drawn with pydeck. pydeck is only imported once there is
+a map to draw.
+"""
+import streamlit as st
+
+from travelbuddy.assets import MARKER_SIZE, build_marker_icon
+from travelbuddy.cities import city_coords
+from travelbuddy.gazetteer import validate_locations
+from travelbuddy.routing import order_day_route
+from travelbuddy.ui.resources import get_gazetteer
+from travelbuddy.ui.settings import MAP_STYLE, MAX_LOCATION_KM
+
+
+@st.cache_resource
+def get_marker_icon_url():
+    """Draws the map marker into static/ once per process."""
+    return build_marker_icon()
+
+
+def check_locations(locations, destination):
+    """Snaps known places to gazetteer coordinates and flags implausible ones."""
+    dest_lat, dest_lon = city_coords(destination)
+    return validate_locations(locations, get_gazetteer(), dest_lat, dest_lon, max_km=MAX_LOCATION_KM)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def validate_plan_locations(plan_digest, destination, _parsed_plan):
+    """check_locations for a whole plan, once per plan."""
+    return check_locations(_parsed_plan.locations, destination)
+
+
+def day_route(locations):
+    """Orders one day's mappable stops into a route; returns (ordered locations, total km)."""
+    return order_day_route(locations[locations['status'] != 'flagged'].reset_index(drop=True))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def plan_day_routes(plan_digest, destination, _checked_locations):
+    """Routes for every day of a plan as {day: (ordered locations, total km)}."""
+    itinerary = _checked_locations[_checked_locations['section'] == 'itinerary']
+    return {int(day): day_route(group) for day, group in itinerary.groupby('day', sort=True)}
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def get_trip_deck(plan_digest, destination, day, _checked_locations, _day_routes):
+    """
+    The map for one day of a plan (or "All"). The deck and its JSON are built
+    once per (plan, day) and reused on every rerun.
+    """
+    from travelbuddy.trip_map import build_deck, map_points, route_paths
+
+    visible = _checked_locations[_checked_locations['status'] != 'flagged']
+    (latitude, longitude), zoom = city_coords(destination), 11
+    routes = _day_routes
+    if day != "All":
+        visible = visible[(visible['section'] == 'itinerary') & (visible['day'] == day)]
+        routes = {day: _day_routes[day]} if day in _day_routes else {}
+        if not visible.empty:
+            latitude, longitude, zoom = float(visible['lat'].mean()), float(visible['lon'].mean()), 12
+    return build_deck(map_points(visible), route_paths(routes), latitude, longitude, get_marker_icon_url(), MARKER_SIZE,
+                      zoom, MAP_STYLE)
+
+
+@st.fragment
+def render_trip_map(parsed_plan, destination, checked_locations, day_routes):
+    """Day picker and map; switching days only reruns this fragment."""
+    options = ["All"] + parsed_plan.day_numbers
+    if st.session_state.selected_day not in options:
+        st.session_state.selected_day = "All"
+    st.radio(
+        "Show on map:", options, key="selected_day", horizontal=True,
+        format_func=lambda d: "All days" if d == "All" else f"Day {d}"
+    )
+    st.pydeck_chart(get_trip_deck(parsed_plan.digest, destination, st.session_state.selected_day, checked_locations, day_routes))
@@ -0,0 +1,21 @@
+"""The itinerary PDF download; travelbuddy.pdf_export (and fpdf) is imported on first use."""
+import streamlit as st
+
+from travelbuddy.metrics import METRICS
+
+
+@st.cache_resource
+def pdf_fonts_available():
+    """Whether the bundled Unicode PDF fonts are present (imports the PDF module once)."""
+    from travelbuddy.pdf_export import load_pdf_fonts
+
+    return bool(load_pdf_fonts()[0])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_pdf_bytes(plan_digest, destination, _plan_data):
+    """Renders the itinerary PDF once per (plan, destination); `_plan_data` is not part of the cache key."""
+    from travelbuddy.pdf_export import create_pdf
+
+    with METRICS.timer("travelbuddy_pdf_render_seconds"):
+        return create_pdf(_plan_data, destination)
@@ -0,0 +1,56 @@
+"""Generating a plan from the sidebar: the Gemini call, parsing, and the live preview while it streams."""
+import streamlit as st
+
+from travelbuddy import planner
+from travelbuddy.plan_parser import PlanParseError, parse_plan_text
+from travelbuddy.ui.resources import get_llm_client, get_plan_cache, get_plan_catalog
+from travelbuddy.ui.settings import LLM_AVAILABLE, PLAN_FORMAT
+
+STREAM_SECTION_TITLES = {
+    "summary": "✨ Trip Summary",
+    "budget": "💰 Budget Breakdown",
+    "accommodation": "🏨 Accommodation Suggestions",
+    "transport": "🚆 Transportation Tips",
+}
+
+
+def generate_travel_plan(origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language, on_chunk=None):
+    """
+    Generates a personalized travel plan using the Gemini API.
+    If `on_chunk` is given the response is streamed and each piece of text is passed to it as it arrives.
+    Raises LLMError if Gemini fails after retries.
+    """
+    if not LLM_AVAILABLE:
+        return None
+    return planner.generate_travel_plan(
+        get_llm_client(), get_plan_cache(),
+        origin, destination, start_date_str, end_date_str, duration, travelers, budget, interests, language,
+        on_chunk=on_chunk,
+        on_cache_hit=lambda: st.toast("⚡ Loaded a saved plan for these trip details."),
+        plan_format=PLAN_FORMAT,
+        catalog=get_plan_catalog(),
+    )
+
+
+def parse_plan(plan_text):
+    """Parses the generated plan text into a ParsedPlan; call once per plan and keep the result."""
+    try:
+        return parse_plan_text(plan_text)
+    except PlanParseError:
+        st.error("⚠️ Failed to parse the AI's response. The structure might be incorrect. Please try generating again.")
+        return None
+
+
+def render_stream_event(container, kind, key, content, days_shown):
+    """Renders a section or day as soon as the incremental parser completes it."""
+    if kind == "day":
+        days_shown.append(key)
+        with container.expander(f"Day {key}", expanded=True):
+            st.markdown(content)
+    elif key == "itinerary":
+        # Days were already rendered one by one; only fall back to the raw section if none were found.
+        if not days_shown:
+            container.markdown(content.strip())
+    else:
+        container.subheader(STREAM_SECTION_TITLES[key])
+        container.markdown(content.strip())
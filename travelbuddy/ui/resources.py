@@ -0,0 +1,85 @@
+"""
+Process-wide resources shared by every session (st.cache_resource): the
+LLM client, plan cache and catalog, trip and photo stores, gazetteer,
+chat answer cache and the background toolkit pool. Each is created on
+first use.
+"""
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from travelbuddy.answer_cache import SemanticAnswerCache
+from travelbuddy.cache import PlanCache
+from travelbuddy.catalog import PlanCatalog
+from travelbuddy.cities import CITY_NAMES
+from travelbuddy.gazetteer import Gazetteer
+from travelbuddy.llm import GeminiClient, create_backend
+from travelbuddy.photo_store import PhotoStore
+from travelbuddy.trip_store import TripStore
+from travelbuddy.ui.settings import (
+    API_KEY, CATALOG_PATH, CHAT_CACHE_SIZE, CHAT_CACHE_THRESHOLD, FAKE_LLM_OPTIONS, GAZETTEER_DIR, LLM_BACKEND,
+    LLM_HEDGE_AFTER, LLM_MAX_CONCURRENT, LLM_MAX_RETRIES, LLM_TIMEOUT, PHOTO_DIR, PHOTO_WORKERS, PLAN_CACHE_PATH,
+    TOOLKIT_WORKERS, TRIPS_PATH,
+)
+
+
+@st.cache_resource
+def get_llm_client():
+    """Returns the Gemini client shared by every session in this process."""
+    return GeminiClient(API_KEY, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES, hedge_after=LLM_HEDGE_AFTER,
+                        max_concurrent=LLM_MAX_CONCURRENT,
+                        backend=create_backend(LLM_BACKEND, API_KEY, FAKE_LLM_OPTIONS))
+
+
+@st.cache_resource
+def get_plan_cache():
+    """Returns the plan cache shared by every session in this process."""
+    return PlanCache(PLAN_CACHE_PATH)
+
+
+@st.cache_resource
+def get_plan_catalog():
+    """Returns the precomputed plan catalog; empty if the file hasn't been built."""
+    return PlanCatalog(CATALOG_PATH)
+
+
+@st.cache_resource
+def get_trip_store():
+    """Returns the saved-trips store, or None if the database can't be opened (trips then last one session)."""
+    try:
+        return TripStore(TRIPS_PATH)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+@st.cache_resource
+def get_photo_store():
+    """Returns the on-disk photo store shared by every session."""
+    return PhotoStore(PHOTO_DIR, workers=PHOTO_WORKERS)
+
+
+@st.cache_resource
+def get_gazetteer():
+    """Returns the bundled gazetteer, or None if data/gazetteer/ hasn't been built."""
+    if not os.path.exists(os.path.join(GAZETTEER_DIR, "meta.json")):
+        return None
+    return Gazetteer(GAZETTEER_DIR)
+
+
+@st.cache_resource
+def get_answer_cache():
+    """Returns the chat answer cache shared by every session, or None if it's turned off."""
+    if CHAT_CACHE_SIZE <= 0:
+        return None
+    gazetteer = get_gazetteer()
+    place_names = CITY_NAMES + tuple(gazetteer.names if gazetteer else ())
+    return SemanticAnswerCache(threshold=CHAT_CACHE_THRESHOLD, entries_per_destination=CHAT_CACHE_SIZE,
+                               place_names=place_names)
+
+
+@st.cache_resource
+def get_toolkit_executor():
+    """Returns the thread pool shared by every session for background toolkit generation."""
+    return ThreadPoolExecutor(max_workers=TOOLKIT_WORKERS, thread_name_prefix="toolkit")
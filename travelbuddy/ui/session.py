@@ -0,0 +1,121 @@
+"""Per-session state: the current trip and plan, opening saved trips and translating the plan."""
+import uuid
+
+import streamlit as st
+
+from travelbuddy.ledger import ExpenseLedger
+from travelbuddy.toolkit import build_itinerary_context
+from travelbuddy.translation import translate_days, translate_plan
+from travelbuddy.ui.chat import new_chat_context
+from travelbuddy.ui.resources import get_llm_client, get_plan_cache, get_trip_store
+from travelbuddy.ui.settings import LLM_AVAILABLE
+
+SESSION_DEFAULTS = {
+    "plan": None,
+    "parsed_plan": None,
+    "selected_day": "All",
+    "expenses": ExpenseLedger,
+    "expense_page": 0,
+    "packing_list": None,
+    "itinerary_context": None,
+    "local_guide": None,
+    "toolkit_jobs": dict,
+    "modified_plans": dict,
+    "trip": None,
+    "journal_photos": dict,
+    "photo_uploader_rev": dict,
+    "messages": list,
+}
+
+
+def init_session_state():
+    """Fills in every session-state key a new session starts without. Callable defaults are called."""
+    for key, default in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default() if callable(default) else default
+    if "chat_context" not in st.session_state:
+        st.session_state.chat_context = new_chat_context() if LLM_AVAILABLE else None
+
+
+def trip_owner():
+    """
+    Whose trips "My Trips" lists: the signed-in user when Streamlit login is
+    set up, otherwise a random key kept in the page URL (?trips=...), so a
+    reload or a bookmark of the page finds the same trips.
+    """
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return f"user:{st.user.get('email')}"
+    if not st.query_params.get("trips"):
+        st.query_params["trips"] = uuid.uuid4().hex
+    return f"key:{st.query_params['trips']}"
+
+
+def current_trip_id():
+    trip = st.session_state.get("trip")
+    return trip["id"] if trip and trip.get("id") else None
+
+
+def activate_plan(parsed_plan, trip, modified_plans=None, expenses=None, journals=None, photos=None):
+    """Makes `parsed_plan` the session's current plan and resets everything derived from the previous one."""
+    st.session_state.plan = parsed_plan.to_text()
+    st.session_state.parsed_plan = parsed_plan
+    st.session_state.trip = trip
+    st.session_state.selected_day = "All"
+
+    st.session_state.packing_list = None
+    st.session_state.local_guide = None
+    st.session_state.toolkit_jobs = {}
+    st.session_state.modified_plans = dict(modified_plans or {})
+    if expenses is not None:
+        st.session_state.expenses = ExpenseLedger.from_records(expenses, trip.get("travelers") or 1)
+        st.session_state.expense_page = 0
+    for key in [k for k in st.session_state if str(k).startswith("journal_notes_day_")]:
+        del st.session_state[key]
+    for day, notes in (journals or {}).items():
+        st.session_state[f"journal_notes_day_{day}"] = notes
+    st.session_state.journal_photos = dict(photos or {})
+
+    st.session_state.itinerary_context = build_itinerary_context(parsed_plan)
+    st.session_state.messages = []
+    st.session_state.chat_context = new_chat_context(st.session_state.itinerary_context) if LLM_AVAILABLE else None
+
+
+def open_trip(trip_id):
+    """Reopens a saved trip straight from the store; no model calls."""
+    store = get_trip_store()
+    parsed_plan = store.load_plan(trip_id) if store else None
+    if parsed_plan is None:
+        st.session_state.trip_error = "That trip could not be loaded."
+        return
+    store.touch(trip_id)
+    activate_plan(
+        parsed_plan, store.get_trip(trip_id),
+        modified_plans=store.load_modified_days(trip_id),
+        expenses=store.load_expenses(trip_id),
+        journals=store.load_journals(trip_id),
+        photos=store.load_photos(trip_id),
+    )
+    st.session_state.messages.append({"role": "assistant", "content": "I've reopened your saved trip. Ask me anything about it."})
+
+
+def translate_current_plan(language):
+    """
+    Translates the session's plan and its re-planned days into `language`
+    (section by section, with locations kept intact) and makes the
+    translation the current trip. Raises LLMError on failure.
+    """
+    translated = translate_plan(get_llm_client(), get_plan_cache(), st.session_state.parsed_plan, language)
+    modified_plans = translate_days(get_llm_client(), get_plan_cache(), st.session_state.modified_plans, language)
+    # Still the same trip: it keeps its id, notes, photos, expenses and re-planned days.
+    trip = dict(st.session_state.trip, language=language)
+    store = get_trip_store()
+    if store and trip.get("id"):
+        store.update_plan(trip["id"], translated, language=language)
+        store.save_modified_days(trip["id"], modified_plans)
+    journals = {
+        int(str(key).rsplit("_", 1)[1]): notes
+        for key, notes in st.session_state.items() if str(key).startswith("journal_notes_day_")
+    }
+    activate_plan(translated, trip, modified_plans=modified_plans, journals=journals,
+                  photos=st.session_state.journal_photos)
+    st.session_state.messages.append({"role": "assistant", "content": f"I've translated your trip plan into {language}. Ask me anything about it."})
@@ -0,0 +1,38 @@
+"""App settings, read once per process from the environment and .env (see the README's "Optional settings")."""
+import os
+
+from dotenv import load_dotenv
+
+from travelbuddy.assets import resolve_map_style
+
+load_dotenv()
+API_KEY = os.getenv("GOOGLE_API_KEY")
+# "fake" swaps Gemini for the offline stand-in in travelbuddy/fake_llm.py, configured by TRAVELBUDDY_FAKE_LLM.
+LLM_BACKEND = os.getenv("TRAVELBUDDY_LLM_BACKEND", "gemini")
+FAKE_LLM_OPTIONS = os.getenv("TRAVELBUDDY_FAKE_LLM", "")
+LLM_AVAILABLE = bool(API_KEY) or LLM_BACKEND.strip().lower() != "gemini"
+PLAN_CACHE_PATH = os.getenv("TRAVELBUDDY_CACHE_PATH", os.path.join(".cache", "travelbuddy.sqlite3"))
+CATALOG_PATH = os.getenv("TRAVELBUDDY_CATALOG_PATH", os.path.join("data", "plan_catalog.sqlite3"))
+TRIPS_PATH = os.getenv("TRAVELBUDDY_TRIPS_PATH", os.path.join(".cache", "trips.sqlite3"))
+PHOTO_DIR = os.getenv("TRAVELBUDDY_PHOTO_DIR", os.path.join(".cache", "photos"))
+PHOTO_WORKERS = int(os.getenv("TRAVELBUDDY_PHOTO_WORKERS", "2"))
+EXPENSE_PAGE_SIZE = 10
+LANGUAGES = ["English", "Hindi (हिन्दी)", "Bengali (বাংলা)", "Telugu (తెలుగు)"]
+PLAN_FORMAT = os.getenv("TRAVELBUDDY_PLAN_FORMAT", "text")
+LLM_TIMEOUT = float(os.getenv("TRAVELBUDDY_LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("TRAVELBUDDY_LLM_MAX_RETRIES", "3"))
+LLM_HEDGE_AFTER = float(os.getenv("TRAVELBUDDY_LLM_HEDGE_AFTER", "0")) or None
+LLM_MAX_CONCURRENT = int(os.getenv("TRAVELBUDDY_LLM_MAX_CONCURRENT", "8")) or None
+TOOLKIT_WORKERS = int(os.getenv("TRAVELBUDDY_TOOLKIT_WORKERS", "4"))
+CHAT_TOKEN_BUDGET = int(os.getenv("TRAVELBUDDY_CHAT_TOKEN_BUDGET", "8000"))
+CHAT_CACHE_SIZE = int(os.getenv("TRAVELBUDDY_CHAT_CACHE_SIZE", "256"))
+CHAT_CACHE_THRESHOLD = float(os.getenv("TRAVELBUDDY_CHAT_CACHE_THRESHOLD", "0.8"))
+MAX_LOCATION_KM = float(os.getenv("TRAVELBUDDY_MAX_LOCATION_KM", "200"))
+GAZETTEER_DIR = os.path.join("data", "gazetteer")
+MAP_STYLE = resolve_map_style(os.getenv("TRAVELBUDDY_MAP_STYLE"))
+METRICS_PATH = os.getenv("TRAVELBUDDY_METRICS_PATH")
+METRICS_PORT = int(os.getenv("TRAVELBUDDY_METRICS_PORT", "0"))
+EVENT_LOG_PATH = os.getenv("TRAVELBUDDY_EVENT_LOG")
+PROFILE_DIR = os.getenv("TRAVELBUDDY_PROFILE_DIR")
+WARM_IMPORTS = os.getenv("TRAVELBUDDY_WARM_IMPORTS", "1") != "0"
+WARMUP_MODULES = ("google.generativeai", "pandas", "travelbuddy.trip_map", "travelbuddy.pdf_export")
@@ -0,0 +1,87 @@
+"""
+The trip toolkit in the app: packing list, local guide and re-planned days,
+generated on demand or in the background as soon as a plan arrives.
+"""
+import streamlit as st
+
+from travelbuddy import toolkit
+from travelbuddy.llm import LLMError
+from travelbuddy.scheduling import PRIORITY_BACKGROUND, PRIORITY_FOREGROUND
+from travelbuddy.ui.resources import get_llm_client, get_plan_cache, get_plan_catalog, get_toolkit_executor
+
+TOOLKIT_JOB_LABELS = {"packing_list": "packing list", "local_guide": "local guide"}
+
+
+def generate_packing_list(itinerary_context, priority=PRIORITY_FOREGROUND):
+    """Generates a packing list based on the itinerary. Raises LLMError on failure."""
+    return toolkit.generate_packing_list(get_llm_client(), itinerary_context, priority)
+
+
+def generate_local_guide(destination, language, priority=PRIORITY_FOREGROUND):
+    """Generates a local guide for the destination. Raises LLMError on failure."""
+    return toolkit.generate_local_guide(get_llm_client(), get_plan_cache(), destination, language, priority)
+
+
+def generate_modified_plan(day_content, reason, destination, language, priority=PRIORITY_FOREGROUND):
+    """Generates a modified plan for a specific day, reusing a cached variant when there is one. Raises LLMError on failure."""
+    return toolkit.generate_modified_plan(get_llm_client(), get_plan_cache(), day_content, reason, destination, language, priority)
+
+
+def generate_modified_days(days, reason, destination, language, priority=PRIORITY_FOREGROUND):
+    """Re-plans several days ({day number: original content}) at once; returns {day number: new content}. Raises LLMError on failure."""
+    return toolkit.generate_modified_days(get_llm_client(), get_plan_cache(), days, reason, destination, language, priority)
+
+
+def prefetch_rainy_variants(parsed_plan, destination, language):
+    """Warms the variant cache with a rainy-day version of every day in the background."""
+    days = {day_num: content for day_num, content in parsed_plan.days.items() if content}
+    if days:
+        get_toolkit_executor().submit(generate_modified_days, days, "rainy", destination, language, PRIORITY_BACKGROUND)
+
+
+def load_catalog_toolkit(parsed_plan, destination, language):
+    """Loads the packing list and local guide that the catalog keeps alongside its plans, if any."""
+    catalog = get_plan_catalog()
+    st.session_state.packing_list = catalog.packing_list(parsed_plan.digest)
+    st.session_state.local_guide = catalog.local_guide(destination, language)
+
+
+def start_toolkit_jobs(parsed_plan, destination, language):
+    """
+    Starts the packing list and local guide in parallel as soon as a plan arrives, behind any chat turns.
+    Anything already loaded (see load_catalog_toolkit) is skipped.
+    """
+    executor = get_toolkit_executor()
+    st.session_state.toolkit_jobs = {}
+    if st.session_state.packing_list is None:
+        st.session_state.toolkit_jobs["packing_list"] = executor.submit(
+            generate_packing_list, toolkit.build_itinerary_context(parsed_plan), PRIORITY_BACKGROUND
+        )
+    if st.session_state.local_guide is None:
+        st.session_state.toolkit_jobs["local_guide"] = executor.submit(
+            generate_local_guide, destination, language, PRIORITY_BACKGROUND
+        )
+
+
+def collect_toolkit_jobs():
+    """Moves finished background results into session state. Returns True if any landed."""
+    landed = False
+    for name, future in list(st.session_state.toolkit_jobs.items()):
+        if not future.done():
+            continue
+        del st.session_state.toolkit_jobs[name]
+        landed = True
+        try:
+            st.session_state[name] = future.result()
+        except LLMError as e:
+            st.toast(f"Couldn't prepare your {TOOLKIT_JOB_LABELS[name]}: {e}")
+    return landed
+
+
+@st.fragment(run_every=1.5)
+def poll_toolkit_jobs():
+    """Shows progress while toolkit jobs run and reruns the page when one finishes."""
+    if collect_toolkit_jobs():
+        st.rerun()
+    pending = ", ".join(TOOLKIT_JOB_LABELS[name] for name in st.session_state.toolkit_jobs)
+    st.caption(f"⏳ Preparing your {pending} in the background...")